@@ -1,10 +1,15 @@
 import pygame
 import sys
-import math
-from typing import List, Tuple, Optional, Dict
-
-# Inicializar pygame
-pygame.init()
+import argparse
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+import engine
+import export
+import games
+from engine import HUMAN, AI, check_winner, is_full
 
 # Nueva configuración de colores con tema oscuro
 BACKGROUND = (30, 30, 30)        # Fondo oscuro
@@ -32,95 +37,226 @@ BOARD_WIDTH = 300
 TREE_WIDTH = 800
 HEIGHT = 750
 LINE_WIDTH = 3
-BOARD_ROWS = 3
-BOARD_COLS = 3
-SQUARE_SIZE = BOARD_WIDTH // BOARD_COLS
-CIRCLE_RADIUS = SQUARE_SIZE // 3
 NODE_RADIUS = 15
 
-# Mejorar la apariencia de la ventana
-screen = pygame.display.set_mode((BOARD_WIDTH + TREE_WIDTH, HEIGHT))
-pygame.display.set_caption("3 en Raya con Árbol Minimax")
-font = pygame.font.SysFont('Arial', 18, bold=True)
-small_font = pygame.font.SysFont('Arial', 14)
-tiny_font = pygame.font.SysFont('Arial', 12)
-
-# Tablero
-board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
-
-# Jugadores
-HUMAN = "X"  # Minimizador
-AI = "O"     # Maximizador
-
-# Valores para Minimax estándar
-WIN_VALUE = 1     # Victoria para el maximizador (IA)
-LOSE_VALUE = -1   # Victoria para el minimizador (Humano)
-DRAW_VALUE = 0    # Empate
-
-# Variables para visualización del árbol
-tree_nodes = []
-tree_edges = []
-current_evaluation = ""
-
-# Diccionario para evitar estados duplicados
-state_cache = {}
-
-def board_to_tuple(board_state):
-    """Convierte el estado del tablero a un formato hasheable (tupla de tuplas)"""
-    return tuple(tuple(row) for row in board_state)
-
-class TreeNode:
-    def __init__(self, board_state, value, depth, is_maximizing, move=None):
-        self.board_state = [row[:] for row in board_state]  # Copia profunda del tablero
-        self.value = value
-        self.depth = depth
-        self.is_maximizing = is_maximizing
-        self.move = move  # Último movimiento que llevó a este estado (fila, columna)
-        self.children = []
-        self.pos = (0, 0)  # Posición en pantalla
-        self.id = len(tree_nodes)
-        # Contador de victorias/derrotas/empates para este nodo
-        self.wins = 0      # Victorias para IA
-        self.losses = 0    # Victorias para Humano
-        self.draws = 0     # Empates
-        # Estado terminal
-        self.is_terminal = False
-        self.terminal_type = None  # "win", "loss", "draw"
-        tree_nodes.append(self)
-
-    def add_child(self, child):
-        self.children.append(child)
-        tree_edges.append((self.id, child.id))
-        
-    def analyze_terminal_states(self):
-        """Analiza estados terminales en subárboles"""
-        if not self.children:
-            winner = check_winner(self.board_state)
-            if winner == AI:
-                self.is_terminal = True
-                self.terminal_type = "win"
-                return 1, 0, 0  # win, loss, draw
-            elif winner == HUMAN:
-                self.is_terminal = True
-                self.terminal_type = "loss"
-                return 0, 1, 0
-            elif is_full(self.board_state):
-                self.is_terminal = True
-                self.terminal_type = "draw"
-                return 0, 0, 1
-            return 0, 0, 0
-        
-        total_wins, total_losses, total_draws = 0, 0, 0
-        for child in self.children:
-            w, l, d = child.analyze_terminal_states()
-            total_wins += w
-            total_losses += l
-            total_draws += d
+# Tamaño de casilla según las dimensiones del tablero (ver init_ui)
+SQUARE_SIZE = BOARD_WIDTH // engine.BOARD_COLS
+CIRCLE_RADIUS = SQUARE_SIZE // 3
+
+# Ventana y fuentes (se crean en init_ui, no al importar el módulo)
+screen = None
+font = None
+small_font = None
+tiny_font = None
+
+def init_ui():
+    """Inicializa pygame, abre la ventana y carga las fuentes"""
+    global screen, font, small_font, tiny_font, SQUARE_SIZE, CIRCLE_RADIUS
+    SQUARE_SIZE = BOARD_WIDTH // max(engine.BOARD_ROWS, engine.BOARD_COLS)
+    CIRCLE_RADIUS = SQUARE_SIZE // 3
+    pygame.init()
+    # Mejorar la apariencia de la ventana
+    screen = pygame.display.set_mode((BOARD_WIDTH + TREE_WIDTH, HEIGHT))
+    pygame.display.set_caption("3 en Raya con Árbol Minimax")
+    font = pygame.font.SysFont('Arial', 18, bold=True)
+    small_font = pygame.font.SysFont('Arial', 14)
+    tiny_font = pygame.font.SysFont('Arial', 12)
+
+# Cachés de renderizado con expulsión del elemento menos usado
+TEXT_CACHE_SIZE = 512
+SPRITE_CACHE_SIZE = 2048
+text_cache = OrderedDict()        # (texto, fuente, color) -> Surface
+mini_board_cache = OrderedDict()  # (filas, columnas, posición) -> Surface
+
+# Solo se vuelve a dibujar cuando algo ha cambiado
+needs_redraw = True
+
+def mark_dirty():
+    """Marca la pantalla para redibujarla en el siguiente fotograma"""
+    global needs_redraw
+    needs_redraw = True
+
+def render_text(text_font, text, color):
+    """Devuelve la superficie del texto, renderizándola solo la primera vez"""
+    key = (text, text_font, color)
+    surface = text_cache.get(key)
+    if surface is None:
+        surface = text_font.render(text, True, color)
+        text_cache[key] = surface
+        if len(text_cache) > TEXT_CACHE_SIZE:
+            text_cache.popitem(last=False)
+    else:
+        text_cache.move_to_end(key)
+    return surface
+
+def mini_board_sprite(position):
+    """Devuelve el mini tablero de una posición, dibujándolo solo la primera vez"""
+    rows, cols = engine.BOARD_ROWS, engine.BOARD_COLS
+    key = (rows, cols, position)
+    sprite = mini_board_cache.get(key)
+    if sprite is not None:
+        mini_board_cache.move_to_end(key)
+        return sprite
+    
+    mini_board_size = 30
+    mini_square = mini_board_size / max(rows, cols)
+    mini_width, mini_height = cols * mini_square, rows * mini_square
+    sprite = pygame.Surface((int(mini_width) + 1, int(mini_height) + 1))
+    
+    # Fondo del mini tablero
+    sprite.fill(BOARD_BG)
+    pygame.draw.rect(sprite, NODE_BORDER, (0, 0, mini_width, mini_height), 1)
+    
+    # Líneas del mini tablero
+    for i in range(1, rows):
+        pygame.draw.line(sprite, NODE_BORDER, (0, i * mini_square), (mini_width, i * mini_square), 1)
+    for i in range(1, cols):
+        pygame.draw.line(sprite, NODE_BORDER, (i * mini_square, 0), (i * mini_square, mini_height), 1)
+    
+    # Dibujar fichas en el mini tablero
+    x_bits, o_bits = position
+    for r in range(rows):
+        for c in range(cols):
+            center_x = c * mini_square + mini_square/2
+            center_y = r * mini_square + mini_square/2
+            cell = r * cols + c
             
-        self.wins = total_wins
-        self.losses = total_losses
-        self.draws = total_draws
-        return total_wins, total_losses, total_draws
+            if x_bits >> cell & 1:
+                # X en mini tablero
+                offset = mini_square * 0.3
+                pygame.draw.line(sprite, HUMAN_COLOR,
+                              (center_x - offset, center_y - offset),
+                              (center_x + offset, center_y + offset), 1)
+                pygame.draw.line(sprite, HUMAN_COLOR,
+                              (center_x + offset, center_y - offset),
+                              (center_x - offset, center_y + offset), 1)
+            elif o_bits >> cell & 1:
+                # O en mini tablero
+                pygame.draw.circle(sprite, AI_COLOR,
+                                 (center_x, center_y),
+                                 max(1, mini_square/2 - 2), 1)
+    
+    mini_board_cache[key] = sprite
+    if len(mini_board_cache) > SPRITE_CACHE_SIZE:
+        mini_board_cache.popitem(last=False)
+    return sprite
+
+# Vista del árbol: coordenadas de mundo, desplazamiento y zoom
+LEVEL_HEIGHT = 100       # Separación vertical entre niveles (mundo)
+MIN_NODE_SPACING = 70    # Separación horizontal mínima entre nodos (mundo)
+GRID_CELL = 128          # Lado de las celdas del índice espacial (mundo)
+MIN_NODE_PX = 5          # Radio en pantalla por debajo del cual se agregan los nodos
+DETAIL_ZOOM = 0.75       # Por debajo no se dibujan textos ni mini tableros
+MIN_ZOOM, MAX_ZOOM = 0.05, 3.0
+PAN_STEP = 60            # Píxeles por pulsación de las flechas
+
+class TreeView:
+    """Transformación entre coordenadas del árbol (mundo) y de pantalla:
+    pantalla = BOARD_WIDTH + mundo * zoom + desplazamiento"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.zoom = 1.0
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+        self.follow = True  # Centrar el árbol hasta que el usuario mueva la vista
+
+    def center(self, width):
+        """Centra horizontalmente un árbol de la anchura dada (si cabe en el panel)"""
+        if self.follow:
+            self.offset_x = max(MIN_NODE_SPACING, (TREE_WIDTH - width * self.zoom) / 2)
+
+    def to_screen(self, x, y):
+        return (int(BOARD_WIDTH + x * self.zoom + self.offset_x),
+                int(y * self.zoom + self.offset_y))
+
+    def to_world(self, screen_x, screen_y):
+        return ((screen_x - BOARD_WIDTH - self.offset_x) / self.zoom,
+                (screen_y - self.offset_y) / self.zoom)
+
+    def visible_rect(self, margin=0):
+        """Rectángulo del mundo visible en el panel (x0, y0, x1, y1)"""
+        x0, y0 = self.to_world(BOARD_WIDTH, 0)
+        x1, y1 = self.to_world(BOARD_WIDTH + TREE_WIDTH, HEIGHT)
+        return x0 - margin, y0 - margin, x1 + margin, y1 + margin
+
+    def pan(self, dx, dy):
+        self.follow = False
+        self.offset_x += dx
+        self.offset_y += dy
+
+    def zoom_at(self, factor, screen_x, screen_y):
+        """Cambia el zoom manteniendo fijo el punto bajo (screen_x, screen_y)"""
+        x, y = self.to_world(screen_x, screen_y)
+        self.follow = False
+        self.zoom = min(MAX_ZOOM, max(MIN_ZOOM, self.zoom * factor))
+        self.offset_x = screen_x - BOARD_WIDTH - x * self.zoom
+        self.offset_y = screen_y - y * self.zoom
+
+class SpatialIndex:
+    """Rejilla uniforme sobre las posiciones de los nodos. Cada fotograma
+    consulta solo las celdas visibles."""
+
+    def __init__(self, cell_size=GRID_CELL):
+        self.cell_size = cell_size
+        self.cells = {}       # (cx, cy) -> lista de nodos
+        self.node_cells = {}  # id del nodo -> (cx, cy)
+
+    def clear(self):
+        self.cells.clear()
+        self.node_cells.clear()
+
+    def __len__(self):
+        return len(self.node_cells)
+
+    def _key(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def update(self, node):
+        """Inserta el nodo o lo mueve a la celda de su posición actual"""
+        key = self._key(*node.pos)
+        old_key = self.node_cells.get(node.id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self.cells[old_key].remove(node)
+            if not self.cells[old_key]:
+                del self.cells[old_key]
+        self.cells.setdefault(key, []).append(node)
+        self.node_cells[node.id] = key
+
+    def visible_cells(self, rect):
+        """Celdas ocupadas que cortan el rectángulo del mundo (x0, y0, x1, y1)"""
+        x0, y0, x1, y1 = rect
+        cx0, cy0 = self._key(x0, y0)
+        cx1, cy1 = self._key(x1, y1)
+        # Recorrer lo más pequeño: el rango visible o las celdas ocupadas
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= len(self.cells):
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    if (cx, cy) in self.cells:
+                        yield (cx, cy)
+        else:
+            for cx, cy in self.cells:
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    yield (cx, cy)
+
+    def query(self, rect):
+        """Nodos cuya posición cae dentro del rectángulo"""
+        x0, y0, x1, y1 = rect
+        result = []
+        for key in self.visible_cells(rect):
+            for node in self.cells[key]:
+                x, y = node.pos
+                if x0 <= x <= x1 and y0 <= y <= y1:
+                    result.append(node)
+        return result
+
+tree_view = TreeView()
+tree_index = SpatialIndex()
+dragging = False  # Se está arrastrando el árbol con el ratón
 
 # Mejoras en las funciones de dibujo
 def draw_board():
@@ -129,18 +265,20 @@ def draw_board():
     pygame.draw.rect(screen, BOARD_BG, (0, 0, BOARD_WIDTH, HEIGHT))
     
     # Borde del tablero
-    pygame.draw.rect(screen, GRID_COLOR, (0, 0, BOARD_WIDTH, BOARD_WIDTH), 6)
+    grid_width = engine.BOARD_COLS * SQUARE_SIZE
+    grid_height = engine.BOARD_ROWS * SQUARE_SIZE
+    pygame.draw.rect(screen, GRID_COLOR, (0, 0, grid_width, grid_height), 6)
     
     # Dibujar líneas del tablero con un suave resalte
-    for row in range(1, BOARD_ROWS):
-        pygame.draw.line(screen, LINE_HIGHLIGHT, (0, row * SQUARE_SIZE), (BOARD_WIDTH, row * SQUARE_SIZE), LINE_WIDTH)
-    for col in range(1, BOARD_COLS):
-        pygame.draw.line(screen, LINE_HIGHLIGHT, (col * SQUARE_SIZE, 0), (col * SQUARE_SIZE, BOARD_WIDTH), LINE_WIDTH)
+    for row in range(1, engine.BOARD_ROWS):
+        pygame.draw.line(screen, LINE_HIGHLIGHT, (0, row * SQUARE_SIZE), (grid_width, row * SQUARE_SIZE), LINE_WIDTH)
+    for col in range(1, engine.BOARD_COLS):
+        pygame.draw.line(screen, LINE_HIGHLIGHT, (col * SQUARE_SIZE, 0), (col * SQUARE_SIZE, grid_height), LINE_WIDTH)
     
     # Dibujar fichas con efectos mejorados
-    for row in range(BOARD_ROWS):
-        for col in range(BOARD_COLS):
-            if board[row][col] == HUMAN:
+    for row in range(engine.BOARD_ROWS):
+        for col in range(engine.BOARD_COLS):
+            if engine.board[row][col] == HUMAN:
                 # Dibujar X con mejor aspecto
                 center_x = col * SQUARE_SIZE + SQUARE_SIZE // 2
                 center_y = row * SQUARE_SIZE + SQUARE_SIZE // 2
@@ -157,7 +295,7 @@ def draw_board():
                                (center_x - offset, center_y + offset), 
                                LINE_WIDTH + 2)
                 
-            elif board[row][col] == AI:
+            elif engine.board[row][col] == AI:
                 # Dibujar O con mejor aspecto
                 center_x = col * SQUARE_SIZE + SQUARE_SIZE // 2
                 center_y = row * SQUARE_SIZE + SQUARE_SIZE // 2
@@ -178,43 +316,134 @@ def draw_board():
     pygame.draw.rect(screen, (200, 210, 220), info_panel, 2, border_radius=10)
     
     # Mostrar estado del juego con texto mejorado
-    status = check_winner(board)
+    status = check_winner(engine.board)
     if status == HUMAN:
-        text = font.render("¡Ganaste!", True, HUMAN_COLOR)
+        text = render_text(font, "¡Ganaste!", HUMAN_COLOR)
     elif status == AI:
-        text = font.render("Gana la IA", True, AI_COLOR)
-    elif is_full(board):
-        text = font.render("¡Empate!", True, TEXT_COLOR)
+        text = render_text(font, "Gana la IA", AI_COLOR)
+    elif is_full(engine.board):
+        text = render_text(font, "¡Empate!", TEXT_COLOR)
     else:
         if is_human_turn:
-            text = font.render("Tu turno (X)", True, HUMAN_COLOR)
+            text = render_text(font, "Tu turno (X)", HUMAN_COLOR)
         else:
-            text = font.render("Turno de la IA (O)", True, AI_COLOR)
+            text = render_text(font, "Turno de la IA (O)", AI_COLOR)
     
     screen.blit(text, (info_panel.centerx - text.get_width() // 2, info_panel.y + 15))
     
     # Instrucciones en el panel
     instructions = [
         "R: Reiniciar juego",
-        "A: Analizar árbol",
-        "M: Mostrar árbol completo"
+        "A: Analizar árbol, E: exportarlo",
+        "M: Mostrar árbol completo",
+        f"P: Cambiar búsqueda ({engine.search_mode})",
+        f"C: Capturar árbol completo ({'sí' if engine.capture_tree else 'no'})",
+        "Rueda: zoom, arrastrar: mover árbol",
+        "Flechas: mover, 0: vista inicial",
+        f"H: Estadísticas ({'sí' if engine.instrumentation else 'no'})"
     ]
     
     for i, instruction in enumerate(instructions):
-        text = small_font.render(instruction, True, TEXT_COLOR)
+        text = render_text(small_font, instruction, TEXT_COLOR)
         screen.blit(text, (info_panel.x + 20, info_panel.y + 50 + i * 25))
     
-    # Explicación de valores
-    explanation = [
-        "Valores de nodos:",
-        " 1: Victoria para la IA (O)",
-        " 0: Empate",
-        "-1: Victoria para Humano (X)"
-    ]
+    # Explicación de valores (o estadísticas de la búsqueda si están activadas)
+    if engine.instrumentation:
+        explanation = hud_lines()
+    else:
+        explanation = [
+            "Valores de nodos:",
+            " 1: Victoria para la IA (O)",
+            " 0: Empate",
+            "-1: Victoria para Humano (X)",
+            "Decimales: estimación heurística"
+        ]
     
     for i, line in enumerate(explanation):
-        text = small_font.render(line, True, TEXT_COLOR)
-        screen.blit(text, (info_panel.x + 20, info_panel.y + 150 + i * 25))
+        text = render_text(small_font, line, TEXT_COLOR)
+        screen.blit(text, (info_panel.x + 20, info_panel.y + 280 + i * 25))
+
+def shown_search():
+    """Búsqueda que muestra la interfaz. Mientras se piensa en el turno del
+    humano, el hilo de ponder reescribe las globales del motor con búsquedas
+    de posiciones que no se han jugado, así que se usa la guardada al empezar."""
+    if ponderer.saved is not None:
+        return ponderer.saved
+    return engine.search_snapshot()
+
+def show_message(text):
+    """Muestra text en la línea de evaluación (también en la búsqueda
+    guardada, para que no se pierda al restaurarla). Se ve aunque las
+    estadísticas estén desactivadas, hasta la siguiente jugada de la IA."""
+    global message_shown
+    message_shown = True
+    engine.current_evaluation = text
+    if ponderer.saved is not None:
+        ponderer.saved["current_evaluation"] = text
+    mark_dirty()
+
+def hud_lines():
+    """Estadísticas de la última jugada de la IA y del último fotograma"""
+    stats = shown_search()["last_search_stats"]
+    if not stats:
+        return ["Sin búsquedas todavía", f"Fotograma: {frame_ms:.1f} ms"]
+    lookups = stats["aciertos_cache"] + stats["fallos_cache"]
+    hit_rate = ponderer.hits / ponderer.lookups if ponderer.lookups else 0
+    return [
+        f"Búsqueda {stats['modo']}: {stats['tiempo_ms']:.1f} ms",
+        f"Nodos: {stats['nodos']}  Podas: {stats['podas']}",
+        f"Caché: {stats['aciertos_cache']}/{lookups} aciertos",
+        f"Profundidad máx.: {stats['profundidad_max']}",
+        f"Ponder: {ponderer.hits}/{ponderer.lookups} aciertos ({hit_rate:.0%})",
+        f"Fotograma: {frame_ms:.1f} ms"
+    ]
+
+def node_color(node):
+    """Color del nodo según si es maximizador/minimizador o terminal"""
+    if node.is_terminal:
+        if node.terminal_type == "win":
+            return TERMINAL_WIN
+        elif node.terminal_type == "loss":
+            return TERMINAL_LOSS
+        return TERMINAL_DRAW
+    return MAX_NODE if node.is_maximizing else MIN_NODE
+
+def summary_color(count, wins, losses, draws):
+    """Mezcla los colores terminales según la proporción de finales de un subárbol"""
+    total = wins + losses + draws
+    if total == 0:
+        return MAX_NODE if count == 1 else NODE_BORDER
+    return tuple((wins * w + losses * l + draws * d) // total
+                 for w, l, d in zip(TERMINAL_WIN, TERMINAL_LOSS, TERMINAL_DRAW))
+
+def draw_aggregated(rect):
+    """Dibuja el árbol alejado con un glifo por subárbol. Se baja desde las
+    raíces: un nodo cuyo subárbol ocupa en pantalla menos de dos radios
+    mínimos se dibuja como un único glifo con los totales W/L/D del
+    subárbol; si no, como un punto con aristas a sus hijos, que se visitan
+    a su vez. Los subárboles fuera de rect no se recorren."""
+    zoom = tree_view.zoom
+    x0, y0, x1, y1 = rect
+    spans = tree_layout.spans()
+    dot = max(1, int(NODE_RADIUS * zoom))
+    stack = tree_layout.roots()
+    while stack:
+        node = stack.pop()
+        left, right, bottom, count = spans[node.id]
+        if right < x0 or left > x1 or bottom < y0 or node.pos[1] > y1:
+            continue
+        center = tree_view.to_screen(*node.pos)
+        if count > 1 and (right - left) * zoom >= 2 * MIN_NODE_PX:
+            for child in node.children:
+                if child.id in spans:
+                    pygame.draw.line(screen, NODE_SHADOW_COLOR, center, tree_view.to_screen(*child.pos))
+                    stack.append(child)
+            pygame.draw.circle(screen, node_color(node), center, dot)
+            continue
+        # El tamaño del glifo crece con el número de nodos que resume
+        side = max(2, min(4 * MIN_NODE_PX, int(2 * MIN_NODE_PX * (count / 8) ** 0.5)))
+        color = summary_color(count, node.wins, node.losses, node.draws) if count > 1 else node_color(node)
+        pygame.draw.rect(screen, color, (center[0] - side // 2, center[1] - side // 2, side, side))
 
 def draw_tree():
     """Dibuja el árbol de decisión Minimax con más estética y claridad"""
@@ -224,247 +453,205 @@ def draw_tree():
     # Borde vertical para separar tablero y árbol
     pygame.draw.line(screen, (180, 190, 200), (BOARD_WIDTH, 0), (BOARD_WIDTH, HEIGHT), 3)
     
-    # Zona de visualización
-    tree_rect = pygame.Rect(BOARD_WIDTH, 0, TREE_WIDTH, HEIGHT)
+    # Zona de visualización: nada del árbol se dibuja fuera de ella
+    tree_rect = pygame.Rect(BOARD_WIDTH + 2, 0, TREE_WIDTH - 2, HEIGHT)
+    screen.set_clip(tree_rect)
     
-    # Dibujar conexiones primero (para que queden detrás de los nodos)
-    for edge in tree_edges:
-        if edge[0] < len(tree_nodes) and edge[1] < len(tree_nodes):
-            start_node = tree_nodes[edge[0]]
-            end_node = tree_nodes[edge[1]]
-            
-            # Dibujar línea de conexión con un color suave
-            pygame.draw.line(screen, NODE_SHADOW_COLOR, 
-                           start_node.pos, end_node.pos, 2)
+    zoom = tree_view.zoom
+    radius = int(NODE_RADIUS * zoom)
+    if radius < MIN_NODE_PX:
+        # Demasiado lejos para distinguir nodos: glifos agregados por subárbol
+        draw_aggregated(tree_view.visible_rect(LEVEL_HEIGHT))
+        visible = ()
+    else:
+        # Solo los nodos cercanos a la vista (con margen para textos y tableros)
+        visible = tree_index.query(tree_view.visible_rect(60 / zoom))
+        
+        # Dibujar conexiones primero (para que queden detrás de los nodos);
+        # el margen de un nivel incluye las aristas hacia padres fuera de la vista
+        for node in tree_index.query(tree_view.visible_rect(LEVEL_HEIGHT)):
+            if node.parent is not None:
+                pygame.draw.line(screen, NODE_SHADOW_COLOR,
+                                 tree_view.to_screen(*node.parent.pos),
+                                 tree_view.to_screen(*node.pos), 2)
     
     # Dibujar nodos con sombras y bordes resaltados
-    for node in tree_nodes:
-        # Color del nodo según si es maximizador/minimizador o terminal
-        if node.is_terminal:
-            if node.terminal_type == "win":
-                color = TERMINAL_WIN
-            elif node.terminal_type == "loss":
-                color = TERMINAL_LOSS
-            else:  # draw
-                color = TERMINAL_DRAW
-        else:
-            color = MAX_NODE if node.is_maximizing else MIN_NODE
+    detailed = zoom >= DETAIL_ZOOM
+    for node in visible:
+        color = node_color(node)
+        center = tree_view.to_screen(*node.pos)
         
         # Sombra sutil del nodo
-        pygame.draw.circle(screen, NODE_SHADOW_COLOR, (node.pos[0] + 2, node.pos[1] + 2), NODE_RADIUS)
+        pygame.draw.circle(screen, NODE_SHADOW_COLOR, (center[0] + 2, center[1] + 2), radius)
         
         # Dibujar el nodo con borde resaltado
-        pygame.draw.circle(screen, color, node.pos, NODE_RADIUS)
-        pygame.draw.circle(screen, NODE_BORDER, node.pos, NODE_RADIUS, 1)
+        pygame.draw.circle(screen, color, center, radius)
+        pygame.draw.circle(screen, NODE_BORDER, center, radius, 1)
+        
+        if not detailed:
+            continue  # Textos y mini tableros solo con zoom suficiente
         
         # Mostrar valor del nodo
-        value_text = small_font.render(str(node.value), True, TEXT_COLOR)
-        screen.blit(value_text, (node.pos[0] - value_text.get_width() // 2, 
-                                node.pos[1] - value_text.get_height() // 2))
+        value_text = render_text(small_font, f"{node.value:.2g}", TEXT_COLOR)
+        screen.blit(value_text, (center[0] - value_text.get_width() // 2, 
+                                center[1] - value_text.get_height() // 2))
         
         # Mostrar estadísticas del subárbol
-        stats_text = tiny_font.render(f"W:{node.wins} L:{node.losses} D:{node.draws}", True, TEXT_COLOR)
-        screen.blit(stats_text, (node.pos[0] - stats_text.get_width() // 2, 
-                                node.pos[1] - 25))
-
-        # Dibujar un mini tablero en cada nodo
-        mini_board_size = 30
-        mini_square = mini_board_size / 3
-        mini_board_pos = (node.pos[0] - mini_board_size / 2, node.pos[1] + 30)
-        
-        # Fondo del mini tablero
-        pygame.draw.rect(screen, BOARD_BG, 
-                        (mini_board_pos[0], mini_board_pos[1], mini_board_size, mini_board_size))
-        pygame.draw.rect(screen, NODE_BORDER, 
-                        (mini_board_pos[0], mini_board_pos[1], mini_board_size, mini_board_size), 1)
-        
-        # Líneas del mini tablero
-        for i in range(1, 3):
-            pygame.draw.line(screen, NODE_BORDER, 
-                            (mini_board_pos[0], mini_board_pos[1] + i * mini_square),
-                            (mini_board_pos[0] + mini_board_size, mini_board_pos[1] + i * mini_square), 1)
-            pygame.draw.line(screen, NODE_BORDER, 
-                            (mini_board_pos[0] + i * mini_square, mini_board_pos[1]),
-                            (mini_board_pos[0] + i * mini_square, mini_board_pos[1] + mini_board_size), 1)
-        
-        # Dibujar fichas en el mini tablero
-        for r in range(3):
-            for c in range(3):
-                center_x = mini_board_pos[0] + c * mini_square + mini_square/2
-                center_y = mini_board_pos[1] + r * mini_square + mini_square/2
-                
-                if node.board_state[r][c] == HUMAN:
-                    # X en mini tablero
-                    offset = mini_square * 0.3
-                    pygame.draw.line(screen, HUMAN_COLOR,
-                                  (center_x - offset, center_y - offset),
-                                  (center_x + offset, center_y + offset), 1)
-                    pygame.draw.line(screen, HUMAN_COLOR,
-                                  (center_x + offset, center_y - offset),
-                                  (center_x - offset, center_y + offset), 1)
-                elif node.board_state[r][c] == AI:
-                    # O en mini tablero
-                    pygame.draw.circle(screen, AI_COLOR,
-                                     (center_x, center_y),
-                                     mini_square/2 - 2, 1)
-
-# Continuar con las demás funciones y lógica de juego...
-
-def check_winner(b: List[List[Optional[str]]]) -> Optional[str]:
-    """Comprueba si hay un ganador"""
-    # Filas
-    for row in b:
-        if row[0] == row[1] == row[2] and row[0] is not None:
-            return row[0]
-    
-    # Columnas
-    for col in range(3):
-        if b[0][col] == b[1][col] == b[2][col] and b[0][col] is not None:
-            return b[0][col]
-    
-    # Diagonales
-    if b[0][0] == b[1][1] == b[2][2] and b[0][0] is not None:
-        return b[0][0]
-    if b[0][2] == b[1][1] == b[2][0] and b[0][2] is not None:
-        return b[0][2]
-    
-    return None
-
-def is_full(b: List[List[Optional[str]]]) -> bool:
-    """Comprueba si el tablero está lleno"""
-    return all(cell is not None for row in b for cell in row)
-
-def get_available_moves(b: List[List[Optional[str]]]) -> List[Tuple[int, int]]:
-    """Devuelve una lista de casillas vacías en el tablero"""
-    moves = []
-    for row in range(BOARD_ROWS):
-        for col in range(BOARD_COLS):
-            if b[row][col] is None:
-                moves.append((row, col))
-    return moves
-
-def minimax(b: List[List[Optional[str]]], depth: int, is_maximizing: bool) -> float:
-    """
-    Implementación del algoritmo Minimax sin poda alfa-beta
-    """
-    # Comprobar estado terminal
-    winner = check_winner(b)
-    if winner == AI:  # Victoria para IA (Maximizador)
-        return WIN_VALUE
-    elif winner == HUMAN:  # Victoria para Humano (Minimizador)
-        return LOSE_VALUE
-    elif is_full(b):  # Empate
-        return DRAW_VALUE
-    
-    # Ordenar los movimientos
-    available_moves = get_available_moves(b)
-    
-    if is_maximizing:  # Turno de la IA (Maximizador)
-        max_eval = -math.inf
-        for row, col in available_moves:
-            b[row][col] = AI
-            eval_value = minimax(b, depth + 1, False)
-            b[row][col] = None
-            max_eval = max(max_eval, eval_value)
-        return max_eval
-    
-    else:  # Turno del Humano (Minimizador)
-        min_eval = math.inf
-        for row, col in available_moves:
-            b[row][col] = HUMAN
-            eval_value = minimax(b, depth + 1, True)
-            b[row][col] = None
-            min_eval = min(min_eval, eval_value)
-        return min_eval
-
-def best_move() -> Tuple[int, int]:
-    """Encuentra el mejor movimiento para la IA usando Minimax y construye el árbol"""
-    global tree_nodes, tree_edges, current_evaluation, state_cache
-    
-    # Limpiar el árbol anterior y caché de estados
-    tree_nodes = []
-    tree_edges = []
-    state_cache = {}
-    
-    best_score = -math.inf
-    move = (-1, -1)
-    
-    # Nodo raíz (turno de la IA - Maximizador)
-    root_node = TreeNode(board, 0, 0, True)
-    
-    # Evaluar cada movimiento posible para la IA
-    available_moves = get_available_moves(board)
-    
-    for row, col in available_moves:
-        # Simular movimiento
-        board[row][col] = AI
-        
-        # Crear nodo para este movimiento
-        move_node = TreeNode(board, 0, 1, False, (row, col))
-        root_node.add_child(move_node)
-        
-        # Evaluar movimiento desde perspectiva del minimizador (Humano)
-        score = minimax(board, 1, False)
-        
-        # Deshacer movimiento
-        board[row][col] = None
-        
-        # Actualizar mejor movimiento
-        if score > best_score:
-            best_score = score
-            move = (row, col)
+        stats_text = render_text(tiny_font, f"W:{node.wins} L:{node.losses} D:{node.draws}", TEXT_COLOR)
+        screen.blit(stats_text, (center[0] - stats_text.get_width() // 2, 
+                                center[1] - radius - 10))
+
+        # Dibujar un mini tablero en cada nodo (sprite cacheado por posición)
+        sprite = mini_board_sprite(node.position)
+        mini_board_pos = (center[0] - sprite.get_width() // 2, center[1] + radius + 15)
+        screen.blit(sprite, mini_board_pos)
         
-        # Actualizar valor del nodo
-        move_node.value = score
+        # Nodos visitados para evaluar el subárbol
+        if node.nodes:
+            nodes_text = render_text(tiny_font, f"{node.nodes} nodos", TEXT_COLOR)
+            screen.blit(nodes_text, (center[0] - nodes_text.get_width() // 2,
+                                     mini_board_pos[1] + sprite.get_height() + 3))
+    
+    screen.set_clip(None)
+    
+    # Resumen de la última búsqueda (con las estadísticas activadas)
+    search = shown_search()
+    if (engine.instrumentation or message_shown) and search["current_evaluation"]:
+        evaluation_text = render_text(tiny_font, search["current_evaluation"], TEXT_COLOR)
+        screen.blit(evaluation_text, (BOARD_WIDTH + 15, HEIGHT - 85))
+    
+    # Zoom actual y nodos dibujados
+    view_text = render_text(tiny_font,
+        f"Zoom {zoom:.0%} | {len(visible)}/{len(tree_index)} nodos visibles", TEXT_COLOR)
+    screen.blit(view_text, (BOARD_WIDTH + TREE_WIDTH - view_text.get_width() - 15, 10))
+    
+    # Árbol completo capturado (solo si la captura está activada)
+    tree_store = search["tree_store"]
+    if tree_store is not None and not ai_pending:
+        store_text = render_text(tiny_font,
+            f"Árbol completo: {len(tree_store)} nodos, {tree_store.nbytes() // 1024} KB",
+            TEXT_COLOR)
+        screen.blit(store_text, (BOARD_WIDTH + 15, HEIGHT - 65))
+    
+    # Nodos visitados por la última búsqueda
+    search_text = render_text(tiny_font, f"Búsqueda {engine.search_mode}: {search['nodes_visited']} nodos", TEXT_COLOR)
+    screen.blit(search_text, (BOARD_WIDTH + 15, HEIGHT - 45))
+    
+    # Estadísticas de la tabla de transposición
+    state_cache = engine.state_cache
+    cache_text = render_text(tiny_font,
+        f"Caché: {len(state_cache)} posiciones | aciertos: {state_cache.hits} | fallos: {state_cache.misses}",
+        TEXT_COLOR)
+    screen.blit(cache_text, (BOARD_WIDTH + 15, HEIGHT - 25))
+
+class TreeLayout:
+    """Disposición ordenada incremental (al estilo Reingold-Tilford): cada
+    hijo se coloca bajo su padre, a distancia mínima del contorno derecho de
+    su nivel, y el padre se centra sobre sus hijos. Los nodos llegan en
+    preorden, así que cada uno amplía el camino derecho del árbol y solo se
+    mueven sus antecesores: O(profundidad) por nodo en lugar de O(todos)."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.level_right = []  # x del nodo más a la derecha de cada nivel
+        self.path = []         # Camino derecho actual (raíz ... último nodo)
+        self.placed = set()    # ids de los nodos colocados
+        self.first_child = {}  # id del padre -> primer hijo colocado
+        self.order = []        # Nodos colocados, en orden de llegada
+        self.span_cache = None  # Ver spans
+        self.root_cache = []
+
+    def width(self) -> float:
+        return max(self.level_right, default=0)
+
+    def add(self, node):
+        """Coloca un nodo nuevo y devuelve la lista de nodos que han cambiado de posición"""
+        parent = node.parent if node.parent is not None and node.parent.id in self.placed else None
+        if parent is not None and parent not in self.path:
+            return self.rebuild(node)  # Fuera del camino derecho: recolocar todo
         
-        # Mensaje de evaluación para visualización
-        current_evaluation = f"Evaluando ({row},{col}): {score}"
-        position_tree()
-        draw_all()
-        pygame.display.flip()
-        pygame.time.delay(300)  # Pausa para visualización
-    
-    # Analizar estadísticas de estados terminales
-    root_node.analyze_terminal_states()
-    
-    # Actualizar evaluación con interpretación
-    interpretation = ""
-    if best_score == WIN_VALUE:
-        interpretation = "Victoria garantizada"
-    elif best_score == LOSE_VALUE:
-        interpretation = "Pérdida inevitable"
-    elif best_score == DRAW_VALUE:
-        interpretation = "Mejor resultado: empate"
-    
-    current_evaluation = f"Mejor movimiento: {move} con valor {best_score} ({interpretation})"
-    return move
-
-def position_tree():
-    """Calcula las posiciones de los nodos para visualización"""
-    if not tree_nodes:
-        return
-    
-    # Organizar nodos por niveles
-    levels = {}
-    for node in tree_nodes:
-        if node.depth not in levels:
-            levels[node.depth] = []
-        levels[node.depth].append(node)
-    
-    max_depth = max(levels.keys()) if levels else 0
-    
-    # Posicionar nodos
-    for depth, nodes in levels.items():
-        # Calcular posición vertical según profundidad
-        y_pos = 50 + depth * 100
+        depth = 0 if parent is None else self.path.index(parent) + 1
+        del self.path[depth:]
+        if parent is not None and parent.id not in self.first_child:
+            self.first_child[parent.id] = node
         
-        # Calcular espaciado horizontal
-        x_spacing = TREE_WIDTH // (len(nodes) + 1)
+        # Bajo el padre o bajo su hermano anterior, sin invadir el nivel
+        x = parent.pos[0] if parent is not None else 0
+        if depth < len(self.level_right):
+            x = max(x, self.level_right[depth] + MIN_NODE_SPACING)
+        else:
+            self.level_right.append(x)
+        node.pos = (x, 50 + depth * LEVEL_HEIGHT)
+        self.level_right[depth] = x
+        self.path.append(node)
+        self.placed.add(node.id)
+        self.order.append(node)
+        self.span_cache = None
+        moved = [node]
         
-        # Asignar posición a cada nodo
-        for i, node in enumerate(nodes):
-            x_pos = BOARD_WIDTH + x_spacing * (i + 1)
-            node.pos = (x_pos, y_pos)
+        # Centrar los antecesores sobre sus hijos colocados (solo se desplazan a la derecha)
+        for level in range(depth - 1, -1, -1):
+            ancestor = self.path[level]
+            x = (self.first_child[ancestor.id].pos[0] + self.path[level + 1].pos[0]) / 2
+            if x <= ancestor.pos[0]:
+                break
+            ancestor.pos = (x, ancestor.pos[1])
+            self.level_right[level] = max(self.level_right[level], x)
+            moved.append(ancestor)
+        return moved
+
+    def rebuild(self, node=None):
+        """Recoloca todos los nodos en preorden (caso general, O(n))"""
+        nodes = self.order + ([node] if node is not None else [])
+        self.clear()
+        known = {n.id for n in nodes}
+        stack = [n for n in reversed(nodes) if n.parent is None or n.parent.id not in known]
+        while stack:
+            current = stack.pop()
+            self.add(current)
+            stack.extend(child for child in reversed(current.children) if child.id in known)
+        return self.order
+
+    def roots(self):
+        """Nodos colocados cuyo padre no está colocado"""
+        self.spans()
+        return list(self.root_cache)
+
+    def spans(self):
+        """Por id de nodo, la extensión de su subárbol colocado (x mínima,
+        x máxima, y máxima) y su número de nodos. Se calcula en O(n) solo
+        la primera vez tras añadir nodos, junto con las raíces."""
+        if self.span_cache is None:
+            # En orden de llegada inverso cada hijo va antes que su padre
+            spans = {}
+            self.root_cache = []
+            for node in reversed(self.order):
+                if node.parent is None or node.parent.id not in self.placed:
+                    self.root_cache.append(node)
+                left = right = node.pos[0]
+                bottom = node.pos[1]
+                count = 1
+                for child in node.children:
+                    span = spans.get(child.id)
+                    if span is not None:
+                        left, right = min(left, span[0]), max(right, span[1])
+                        bottom = max(bottom, span[2])
+                        count += span[3]
+                spans[node.id] = (left, right, bottom, count)
+            self.span_cache = spans
+        return self.span_cache
+
+tree_layout = TreeLayout()
+
+def add_view_node(node):
+    """Añade un nodo recibido de la búsqueda a la vista, recolocando solo
+    los nodos afectados y actualizando su entrada en el índice espacial"""
+    view_nodes.append(node)
+    for moved in tree_layout.add(node):
+        tree_index.update(moved)
+    tree_view.center(tree_layout.width())
 
 def draw_all():
     """Dibuja todos los elementos"""
@@ -476,45 +663,269 @@ def draw_all():
     draw_tree()
 
 def reset_game():
-    """Reinicia el juego"""
-    global board, is_human_turn, game_over, tree_nodes, tree_edges, current_evaluation, state_cache
-    board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
+    """Reinicia el juego (cancelando la búsqueda de la IA si está en curso)"""
+    global is_human_turn, game_over, ai_pending, view_nodes, game_moves
+    ai_worker.cancel()
+    ponderer.reset()
+    engine.reset_game()
     is_human_turn = True
     game_over = False
-    tree_nodes = []
-    tree_edges = []
-    current_evaluation = ""
-    state_cache = {}
-
-def analyze_tree():
-    """Analiza el árbol para actualizar estadísticas"""
-    if tree_nodes:
-        # Encontrar nodo raíz (profundidad 0)
-        for node in tree_nodes:
-            if node.depth == 0:
-                node.analyze_terminal_states()
-                break
+    ai_pending = False
+    view_nodes = []
+    game_moves = []
+    tree_index.clear()
+    tree_layout.clear()
+    tree_view.reset()
 
-def handle_keyboard():
-    """Maneja la entrada del teclado"""
-    keys = pygame.key.get_pressed()
-    
-    # Analizar árbol (para actualizar estadísticas)
-    if keys[pygame.K_a]:
-        analyze_tree()
+def finish_game():
+    """Marca el final de la partida y la añade al registro de partidas
+    (solo en el tablero clásico, el único que admite el formato)"""
+    global game_over
+    game_over = True
+    if game_log_path and engine.is_standard_board():
+        try:
+            games.append_game(game_log_path, game_moves)
+        except (OSError, ValueError) as e:
+            show_message(f"No se pudo guardar la partida: {e}")
+
+class AIWorker:
+    """Ejecuta best_move en un hilo aparte y publica sus resultados parciales
+    (cada hijo de la raíz evaluado y el movimiento final) en una cola"""
+
+    def __init__(self):
+        self.results = queue.Queue()
+        self.thread = None
+        self.cancel_event = threading.Event()
+        self.generation = 0  # Identifica la búsqueda en curso
+
+    def busy(self) -> bool:
+        """Indica si el hilo de búsqueda sigue vivo (aunque esté cancelado)"""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, board_state):
+        """Lanza una búsqueda sobre una copia del tablero"""
+        self.generation += 1
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       args=(self.generation, self.cancel_event, board_state))
+        self.thread.start()
+
+    def cancel(self):
+        """Pide a la búsqueda en curso que termine cuanto antes"""
+        self.cancel_event.set()
+
+    def _run(self, generation, cancel_event, board_state):
+        # Pequeña pausa antes de pensar (interrumpible)
+        if cancel_event.wait(THINK_DELAY_MS / 1000):
+            return
+
+        def on_child(node):
+            self.results.put(("child", generation, node))
+            cancel_event.wait(REVEAL_DELAY_MS / 1000)  # Pausa para visualización
+
+        try:
+            move = engine.best_move(board_state, on_child=on_child, should_stop=cancel_event.is_set)
+        except Exception as e:
+            # Avisar del fallo para que la partida no se quede esperando
+            traceback.print_exc()
+            self.results.put(("error", generation, f"{type(e).__name__}: {e}"))
+            return
+        if not cancel_event.is_set():
+            self.results.put(("done", generation, move))
+
+    def drain(self):
+        """Devuelve los mensajes pendientes de la búsqueda actual, sin bloquear"""
+        messages = []
+        while True:
+            try:
+                kind, generation, payload = self.results.get_nowait()
+            except queue.Empty:
+                return messages
+            if generation == self.generation and not self.cancel_event.is_set():
+                messages.append((kind, payload))
+
+def search_settings():
+    """Ajustes del motor que cambian la respuesta de la IA a una posición"""
+    return (engine.search_mode, engine.capture_tree, engine.time_budget_ms, engine.mcts_iterations)
+
+class Ponderer:
+    """Aprovecha el turno del humano: calcula en un hilo aparte la respuesta
+    de la IA a cada jugada posible del humano y la guarda para servirla al
+    instante cuando el humano juegue. Las respuestas se guardan junto con los
+    ajustes del motor con que se calcularon, así que al cambiar de modo (P)
+    o de captura (C) no se sirven respuestas de otra búsqueda."""
+
+    def __init__(self):
+        self.thread = None
+        self.cancel_event = threading.Event()
+        self.position = None  # (Posición (X, O), ajustes) sobre la que se está pensando
+        self.cache = {}       # (Posición tras la jugada del humano, ajustes) -> (movimiento, raíz, búsqueda)
+        self.saved = None     # Búsqueda visible antes de empezar, para restaurarla
+        self.hits = 0
+        self.lookups = 0
+
+    def busy(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, board_state):
+        """Empieza a pensar las respuestas a todas las jugadas del humano"""
+        self.cancel()
+        self.position = (engine.board_to_bits(board_state), search_settings())
+        self.cache = {}
+        if self.saved is None:  # Si no, las globales son de la búsqueda anterior
+            self.saved = engine.search_snapshot()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       args=(self.position, self.cancel_event, self.cache))
+        self.thread.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def stop(self):
+        """Cancela el hilo, espera a que termine y restaura la búsqueda visible.
+        Minimax y alfa-beta solo se interrumpen entre hijos de la raíz, así que
+        la espera se limita a PONDER_STOP_MS: si el hilo sigue vivo, la
+        búsqueda visible se restaura cuando termine (ver finish)."""
+        self.cancel()
+        if self.thread is not None:
+            self.thread.join(PONDER_STOP_MS / 1000)
+        self.finish()
+
+    def reset(self):
+        """Cancela y olvida todo lo calculado (el tablero ha cambiado de partida)"""
+        self.cancel()
+        self.position = None
+        self.cache = {}
+        self.saved = None
+
+    def is_current(self, board_state) -> bool:
+        """Indica si ya se ha pensado sobre este tablero con los ajustes actuales"""
+        return self.position == (engine.board_to_bits(board_state), search_settings())
+
+    def _run(self, position, cancel_event, cache):
+        (x_bits, o_bits), settings = position
+        for cell in engine.MOVE_ORDER:
+            if cancel_event.is_set():
+                return
+            if (x_bits | o_bits) >> cell & 1:
+                continue
+            reply = (x_bits | 1 << cell, o_bits)
+            if engine.bits_winner(*reply) or reply[0] | reply[1] == engine.FULL_MASK:
+                continue  # Tras esta jugada la partida ha terminado
+            move = engine.best_move(engine.bits_to_board(*reply), should_stop=cancel_event.is_set,
+                                    log_stats=False)
+            if cancel_event.is_set():
+                return  # Búsqueda incompleta: no se guarda
+            cache[reply, settings] = (move, engine.tree_nodes[0], engine.search_snapshot())
+
+    def finish(self):
+        """Restaura la búsqueda visible cuando el hilo ha terminado"""
+        if self.saved is not None and not self.busy():
+            engine.restore_search(self.saved)
+            self.saved = None
+            mark_dirty()
+
+    def lookup(self, board_state):
+        """Respuesta calculada para el tablero actual, o None"""
+        self.lookups += 1
+        entry = self.cache.get((engine.board_to_bits(board_state), search_settings()))
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+def handle_keyboard(event):
+    """Maneja una pulsación de tecla (una vez por KEYDOWN, no mientras se mantiene)"""
+    # Recalcular las estadísticas del árbol (ya se acumulan durante la búsqueda)
+    if event.key == pygame.K_a and view_nodes and not ai_pending:
+        view_nodes[0].analyze_terminal_states()
+        mark_dirty()
     
     # Mostrar árbol completo con la tecla M
-    if keys[pygame.K_m]:
-        draw_tree()
+    if event.key == pygame.K_m:
+        mark_dirty()
+    
+    # Exportar el árbol con la tecla E (el capturado completo si lo hay)
+    if event.key == pygame.K_e and view_nodes and not ai_pending:
+        tree_store = shown_search()["tree_store"]
+        if tree_store is not None:
+            records = export.tree_store_records(tree_store)
+        else:
+            records = export.tree_node_records(view_nodes[0])
+        try:
+            lines = export.export_tree(records, export_path)
+        except OSError as e:
+            show_message(f"No se pudo exportar el árbol: {e}")
+        else:
+            show_message(f"Árbol exportado a {export_path} ({lines} líneas)")
+    
+    # Estadísticas de búsqueda y tiempo de fotograma con la tecla H
+    if event.key == pygame.K_h:
+        engine.instrumentation = not engine.instrumentation
 
 # Variables de estado del juego
 is_human_turn = True  # Comienza el humano
 game_over = False
 
+# Búsqueda de la IA en segundo plano
+THINK_DELAY_MS = 500   # Pausa antes de que la IA empiece a pensar
+REVEAL_DELAY_MS = 300  # Pausa entre hijos de la raíz para visualizar el árbol
+PONDER_STOP_MS = 1000  # Espera máxima a que se detenga el hilo de ponder
+ai_worker = AIWorker()
+ponderer = Ponderer()
+pondering = True       # Pensar las respuestas durante el turno del humano
+ai_pending = False     # Hay una búsqueda lanzada cuyo resultado no se ha aplicado
+view_nodes = []        # Nodos del árbol recibidos del hilo de búsqueda
+export_path = "arbol.jsonl"  # Fichero de la tecla E (.dot para Graphviz)
+game_moves = []        # Casillas jugadas en la partida actual, en orden
+game_log_path = "partidas.bin"  # Registro de partidas terminadas (ver games.py)
+frame_ms = 0.0         # Tiempo del último fotograma (solo con las estadísticas activadas)
+message_shown = False  # La línea de evaluación tiene un mensaje para el usuario (ver show_message)
+
+def parse_args(argv=None):
+    """Lee el tamaño del tablero y el presupuesto de tiempo de la línea de órdenes"""
+    parser = argparse.ArgumentParser(description="3 en raya con árbol Minimax")
+    parser.add_argument("--filas", type=int, default=3, help="filas del tablero")
+    parser.add_argument("--columnas", type=int, default=3, help="columnas del tablero")
+    parser.add_argument("--en-raya", type=int, default=3, help="fichas en línea para ganar")
+    parser.add_argument("--tiempo", type=int, default=engine.time_budget_ms,
+                        help="milisegundos por jugada para las búsquedas iterativa y mcts")
+    parser.add_argument("--simulaciones", type=int, default=engine.mcts_iterations,
+                        help="simulaciones máximas por jugada de la búsqueda mcts")
+    parser.add_argument("--procesos", type=int, default=0,
+                        help="procesos para evaluar en paralelo las jugadas de la IA (minimax y alfabeta)")
+    parser.add_argument("--sin-ponder", action="store_true",
+                        help="no calcular las respuestas de la IA durante el turno del humano")
+    parser.add_argument("--exportar", metavar="FICHERO", default=export_path,
+                        help="fichero donde la tecla E exporta el árbol (.jsonl o .dot)")
+    parser.add_argument("--partidas", metavar="FICHERO", default=game_log_path,
+                        help="registro binario donde se añade cada partida terminada (vacío para no guardarlas)")
+    parser.add_argument("--registro", metavar="FICHERO",
+                        help="añadir las estadísticas de cada jugada de la IA a un fichero JSON lines")
+    return parser.parse_args(argv)
+
 # Juego principal
 def main():
-    global is_human_turn, game_over
+    global is_human_turn, ai_pending, view_nodes, needs_redraw, dragging, frame_ms, pondering
+    global export_path, game_log_path, message_shown
+    
+    args = parse_args()
+    try:
+        engine.configure(args.filas, args.columnas, args.en_raya)
+    except ValueError as e:
+        sys.exit(str(e))
+    engine.time_budget_ms = args.tiempo
+    engine.mcts_iterations = args.simulaciones
+    engine.parallel_workers = args.procesos
+    pondering = not args.sin_ponder
+    export_path = args.exportar
+    game_log_path = args.partidas
+    if args.registro:
+        engine.stats_log_path = args.registro
+        engine.instrumentation = True
     
+    init_ui()
+    engine.get_solved_table()  # Cargar la tabla resuelta al arrancar
     clock = pygame.time.Clock()
     
     while True:
@@ -523,56 +934,152 @@ def main():
                 pygame.quit()
                 sys.exit()
             
+            # Cualquier evento salvo mover el ratón puede cambiar la pantalla
+            if event.type != pygame.MOUSEMOTION:
+                mark_dirty()
+            
+            # Manejar teclado
+            if event.type == pygame.KEYDOWN:
+                handle_keyboard(event)
+            
             # Reiniciar juego al presionar 'R'
             if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
                 reset_game()
             
+            # Cambiar el modo de búsqueda al presionar 'P' y activar o
+            # desactivar la captura del árbol completo con 'C' (no mientras
+            # busca la IA). Lo pensado en el turno del humano se abandona:
+            # las respuestas se guardan por ajustes y se vuelven a pensar
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_p, pygame.K_c):
+                if ai_pending:
+                    show_message("Espera a que termine la búsqueda para cambiar el modo")
+                else:
+                    ponderer.stop()
+                    if event.key == pygame.K_p:
+                        engine.toggle_search_mode()
+                    else:
+                        engine.capture_tree = not engine.capture_tree
+            
+            # Zoom con la rueda sobre el panel del árbol
+            if event.type == pygame.MOUSEWHEEL:
+                mouse_x, mouse_y = pygame.mouse.get_pos()
+                if mouse_x >= BOARD_WIDTH:
+                    tree_view.zoom_at(1.15 ** event.y, mouse_x, mouse_y)
+            
+            # Desplazar el árbol arrastrando con el ratón
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3) and event.pos[0] >= BOARD_WIDTH:
+                dragging = True
+            elif event.type == pygame.MOUSEBUTTONUP:
+                dragging = False
+            elif event.type == pygame.MOUSEMOTION and dragging:
+                tree_view.pan(*event.rel)
+                mark_dirty()
+            
+            # Desplazar con las flechas y restablecer la vista con '0'
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_LEFT:
+                    tree_view.pan(PAN_STEP, 0)
+                elif event.key == pygame.K_RIGHT:
+                    tree_view.pan(-PAN_STEP, 0)
+                elif event.key == pygame.K_UP:
+                    tree_view.pan(0, PAN_STEP)
+                elif event.key == pygame.K_DOWN:
+                    tree_view.pan(0, -PAN_STEP)
+                elif event.key == pygame.K_0:
+                    tree_view.reset()
+            
             # Manejar clic del mouse para el turno del humano
             if not game_over and is_human_turn and event.type == pygame.MOUSEBUTTONDOWN:
                 x, y = event.pos
                 # Verificar que el clic fue en el tablero
-                if x < BOARD_WIDTH and y < BOARD_WIDTH:
+                if x < engine.BOARD_COLS * SQUARE_SIZE and y < engine.BOARD_ROWS * SQUARE_SIZE:
                     row = y // SQUARE_SIZE
                     col = x // SQUARE_SIZE
                     
                     # Verificar casilla vacía
-                    if board[row][col] is None:
+                    if engine.board[row][col] is None:
                         # Realizar movimiento humano
-                        board[row][col] = HUMAN
+                        engine.board[row][col] = HUMAN
+                        game_moves.append(row * engine.BOARD_COLS + col)
                         is_human_turn = False
                         
                         # Verificar fin del juego
-                        if check_game_over():
-                            game_over = True
+                        if engine.check_game_over():
+                            finish_game()
         
-        # Manejar teclado
-        handle_keyboard()
+        # Recoger los resultados parciales de la búsqueda en segundo plano
+        for kind, payload in ai_worker.drain():
+            mark_dirty()
+            if kind == "child":
+                if not view_nodes:
+                    add_view_node(payload.parent)
+                add_view_node(payload)
+            elif kind in ("done", "error"):
+                if kind == "error":
+                    # La búsqueda ha fallado: se juega la primera casilla libre
+                    show_message(f"Error en la búsqueda de la IA ({payload})")
+                    payload = engine.get_available_moves(engine.board)[0]
+                row, col = payload
+                engine.board[row][col] = AI
+                game_moves.append(row * engine.BOARD_COLS + col)
+                ai_pending = False
+                is_human_turn = True
+                
+                # Verificar fin del juego
+                if engine.check_game_over():
+                    finish_game()
         
-        # Turno de la IA
-        if not game_over and not is_human_turn:
-            pygame.time.delay(500)  # Pequeña pausa
-            
-            # Obtener mejor movimiento
-            row, col = best_move()
-            board[row][col] = AI
-            
-            is_human_turn = True
-            
-            # Verificar fin del juego
-            if check_game_over():
-                game_over = True
+        # Turno del humano: pensar sus posibles jugadas mientras decide
+        if (pondering and not game_over and is_human_turn and not ai_worker.busy()
+                and not ponderer.busy() and not ponderer.is_current(engine.board)):
+            ponderer.start(engine.board)
         
-        # Actualizar pantalla
-        draw_all()
-        pygame.display.update()
+        # Turno de la IA: dejar de pensar y esperar a que el hilo termine
+        if not is_human_turn:
+            ponderer.cancel()
+        
+        # Turno de la IA: lanzar la búsqueda (cuando la anterior haya terminado)
+        if (not game_over and not is_human_turn and not ai_pending
+                and not ai_worker.busy() and not ponderer.busy()):
+            ponderer.finish()
+            view_nodes = []
+            tree_index.clear()
+            tree_layout.clear()
+            message_shown = False  # La nueva búsqueda reemplaza el mensaje
+            pondered = ponderer.lookup(engine.board) if pondering else None
+            if pondered is not None:
+                # Respuesta ya calculada: se juega al instante con su árbol
+                (row, col), root, snapshot = pondered
+                engine.restore_search(snapshot)
+                engine.last_search_stats = dict(engine.last_search_stats, ponder=True)
+                if engine.instrumentation and engine.stats_log_path is not None:
+                    engine.log_search_stats(engine.stats_log_path, *engine.board_to_bits(engine.board))
+                add_view_node(root)
+                for child in root.children:
+                    add_view_node(child)
+                engine.board[row][col] = AI
+                game_moves.append(row * engine.BOARD_COLS + col)
+                is_human_turn = True
+                if engine.check_game_over():
+                    finish_game()
+                mark_dirty()
+            else:
+                ai_worker.start([row[:] for row in engine.board])
+                ai_pending = True
+        elif is_human_turn:
+            ponderer.finish()
+        
+        # Actualizar pantalla solo si algo ha cambiado
+        if needs_redraw:
+            if engine.instrumentation:
+                frame_start = time.perf_counter()
+                draw_all()
+                frame_ms = (time.perf_counter() - frame_start) * 1000
+            else:
+                draw_all()
+            pygame.display.update()
+            needs_redraw = False
         clock.tick(30)  # Limitar a 30 FPS
 
-def check_game_over() -> bool:
-    """Comprueba si el juego ha terminado"""
-    winner = check_winner(board)
-    if winner or is_full(board):
-        return True
-    return False
-
 if __name__ == "__main__":
     main()
@@ -0,0 +1,80 @@
+"""
+Evaluación vectorizada de lotes de posiciones con NumPy.
+
+Cada posición es una fila de un array (N, casillas) de int8 con 0 para
+las casillas vacías, 1 para X (humano) y 2 para O (IA), en el mismo orden
+de casillas que el motor (fila a fila). Las líneas ganadoras son las de
+engine.WIN_MASKS, así que los resultados coinciden con check_winner,
+is_full y get_available_moves para el tamaño de tablero configurado.
+
+NumPy es una dependencia opcional: solo la necesita este módulo.
+"""
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+import engine
+
+EMPTY, X_CELL, O_CELL = 0, 1, 2
+NO_WINNER = 0  # Valor de winner cuando nadie ha completado una línea
+
+class BatchResult(NamedTuple):
+    winner: np.ndarray  # (N,) int8: NO_WINNER, X_CELL u O_CELL
+    full: np.ndarray    # (N,) bool: tablero lleno
+    legal: np.ndarray   # (N, casillas) bool: casillas vacías
+
+def encode_boards(boards: List[List[List[Optional[str]]]]) -> np.ndarray:
+    """Convierte tableros de listas del motor en un array (N, casillas) de int8"""
+    codes = {None: EMPTY, engine.HUMAN: X_CELL, engine.AI: O_CELL}
+    return np.array([[codes[cell] for row in b for cell in row] for b in boards],
+                    dtype=np.int8).reshape(len(boards), engine.NUM_CELLS)
+
+def _check_shape(boards: np.ndarray) -> np.ndarray:
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim != 2 or boards.shape[1] != engine.NUM_CELLS:
+        raise ValueError(f"se esperaba un array (N, {engine.NUM_CELLS}) y se recibió {boards.shape}")
+    if engine.NUM_CELLS > 64:
+        raise ValueError("los lotes admiten tableros de hasta 64 casillas")
+    return boards
+
+def pack_bits(cells: np.ndarray) -> np.ndarray:
+    """Empaqueta una máscara (N, casillas) en bitboards uint64 (casilla i = bit i)"""
+    bits = np.zeros(len(cells), dtype=np.uint64)
+    for cell in range(cells.shape[1]):
+        bits |= cells[:, cell].astype(np.uint64) << np.uint64(cell)
+    return bits
+
+def has_line(bits: np.ndarray) -> np.ndarray:
+    """Indica qué bitboards contienen alguna línea ganadora del motor"""
+    if isinstance(engine.WINNING, list):
+        # Tableros pequeños: la misma tabla precalculada que usa check_winner
+        return np.asarray(engine.WINNING, dtype=bool)[bits.astype(np.intp)]
+    result = np.zeros(len(bits), dtype=bool)
+    for mask in engine.WIN_MASKS:
+        mask = np.uint64(mask)
+        result |= (bits & mask) == mask
+    return result
+
+def check_winner_batch(boards: np.ndarray) -> np.ndarray:
+    """Ganador de cada posición (X tiene prioridad, igual que check_winner)"""
+    boards = _check_shape(boards)
+    x_wins = has_line(pack_bits(boards == X_CELL))
+    o_wins = has_line(pack_bits(boards == O_CELL))
+    winner = np.full(len(boards), NO_WINNER, dtype=np.int8)
+    winner[o_wins] = O_CELL
+    winner[x_wins] = X_CELL
+    return winner
+
+def is_full_batch(boards: np.ndarray) -> np.ndarray:
+    """Posiciones sin casillas vacías"""
+    return (_check_shape(boards) != EMPTY).all(axis=1)
+
+def legal_moves_batch(boards: np.ndarray) -> np.ndarray:
+    """Máscara de casillas vacías de cada posición (como get_available_moves)"""
+    return _check_shape(boards) == EMPTY
+
+def analyze_batch(boards: np.ndarray) -> BatchResult:
+    """Ganador, tablero lleno y casillas libres de todo el lote a la vez"""
+    boards = _check_shape(boards)
+    legal = boards == EMPTY
+    return BatchResult(check_winner_batch(boards), ~legal.any(axis=1), legal)
@@ -0,0 +1,379 @@
+"""
+Banco de pruebas de rendimiento del motor y del dibujo del árbol.
+
+Mide las rutas críticas (comprobación de ganador, generación de
+movimientos, nodos por segundo de Minimax, latencia de best_move desde
+cada apertura, evaluación por lotes, aceleración de la búsqueda
+paralela, coste de TreeNode y tiempo de fotograma), guarda los
+resultados en JSON y los compara con una base de referencia:
+
+    python benchmark.py --guardar-base          # medir y fijar la base
+    python benchmark.py --umbral 0.1            # medir y comparar
+
+Devuelve 1 si alguna métrica empeora más que el umbral. El dibujo se
+mide sin ventana con el controlador de vídeo "dummy" de SDL; si pygame
+no está instalado esa parte se omite.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+import importlib.util
+from typing import Callable, Dict, List, Tuple
+
+import engine
+
+BENCHMARK_VERSION = 1
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+UI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Tic tac toe.py")
+SEED = 20240101
+SEARCH_MODES = ("tabla", "minimax", "alfabeta")
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    """Mejor tiempo (segundos) de varias ejecuciones, con el GC desactivado"""
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def metric(value: float, unit: str, higher_is_better: bool) -> Dict[str, object]:
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+def sample_boards(count: int) -> List[List[List[object]]]:
+    """Tableros alcanzables en partidas aleatorias (reproducibles)"""
+    rng = random.Random(SEED)
+    boards = []
+    while len(boards) < count:
+        engine.reset_game()
+        b = engine.board
+        player = engine.HUMAN
+        while len(boards) < count:
+            boards.append([row[:] for row in b])
+            if engine.check_winner(b) or engine.is_full(b):
+                break
+            row, col = rng.choice(engine.get_available_moves(b))
+            b[row][col] = player
+            player = engine.AI if player == engine.HUMAN else engine.HUMAN
+    engine.reset_game()
+    return boards
+
+def distinct_openings() -> List[Tuple[int, int]]:
+    """Primeras jugadas del humano distintas salvo simetría"""
+    openings = {}
+    for cell in range(engine.NUM_CELLS):
+        key, _ = engine.canonical_key(1 << cell, 0)
+        openings.setdefault(key, (cell // engine.BOARD_COLS, cell % engine.BOARD_COLS))
+    return sorted(openings.values())
+
+def bench_rules(results: Dict[str, object], repeat: int):
+    boards = sample_boards(2000)
+
+    def run_check_winner():
+        for b in boards:
+            engine.check_winner(b)
+
+    def run_available_moves():
+        for b in boards:
+            engine.get_available_moves(b)
+
+    elapsed = best_time(run_check_winner, repeat)
+    results["check_winner"] = metric(len(boards) / elapsed, "llamadas/s", True)
+    elapsed = best_time(run_available_moves, repeat)
+    results["get_available_moves"] = metric(len(boards) / elapsed, "llamadas/s", True)
+
+class NoTable(engine.TranspositionTable):
+    """Tabla de transposición que nunca encuentra ni guarda nada"""
+
+    def lookup(self, x_bits, o_bits, is_maximizing):
+        return None
+
+    def store(self, x_bits, o_bits, is_maximizing, value, move=None, flag=engine.EXACT):
+        pass
+
+def bench_minimax(results: Dict[str, object], repeat: int):
+    """Nodos por segundo de Minimax desde el tablero vacío, sin tabla de
+    transposición: con ella el árbol se reduce a unos pocos miles de nodos
+    y la medida queda dominada por el ruido"""
+    empty = [[None] * engine.BOARD_COLS for _ in range(engine.BOARD_ROWS)]
+    nodes = 0
+
+    def run():
+        nonlocal nodes
+        engine.nodes_visited = 0
+        engine.minimax(empty, 0, True)
+        nodes = engine.nodes_visited
+
+    table = engine.state_cache
+    engine.state_cache = NoTable()
+    try:
+        elapsed = best_time(run, repeat)
+    finally:
+        engine.state_cache = table
+    results["minimax_nodes"] = metric(nodes, "nodos", False)
+    results["minimax"] = metric(nodes / elapsed, "nodos/s", True)
+    engine.state_cache.clear()
+
+def bench_best_move(results: Dict[str, object], repeat: int):
+    """Latencia de best_move para cada apertura distinta y cada modo"""
+    engine.get_solved_table()  # La carga de la tabla no cuenta en la latencia
+    previous_mode = engine.search_mode
+    try:
+        for mode in SEARCH_MODES:
+            engine.search_mode = mode
+            for row, col in distinct_openings():
+                b = [[None] * engine.BOARD_COLS for _ in range(engine.BOARD_ROWS)]
+                b[row][col] = engine.HUMAN
+
+                def run():
+                    engine.state_cache.clear()
+                    engine.best_move(b)
+
+                elapsed = best_time(run, repeat)
+                results[f"best_move[{mode}]({row},{col})"] = metric(elapsed * 1000, "ms", False)
+    finally:
+        engine.search_mode = previous_mode
+        engine.state_cache.clear()
+        engine.reset_game()
+
+def bench_tree_nodes(results: Dict[str, object], repeat: int):
+    """Coste de creación y memoria por nodo de TreeNode (y de TreeStore)"""
+    count = 20000
+    position = (0b000010001, 0b100000100)
+
+    def run():
+        engine.tree_nodes = []
+        engine.tree_edges = []
+        root = engine.TreeNode(position, 0, 0, True)
+        for _ in range(count - 1):
+            root.add_child(engine.TreeNode(position, 0, 1, False))
+
+    elapsed = best_time(run, repeat)
+    results["tree_node_create"] = metric(elapsed / count * 1e6, "us/nodo", False)
+
+    engine.tree_nodes = []
+    engine.tree_edges = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    run()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    results["tree_node_memory"] = metric((after - before) / count, "bytes/nodo", False)
+
+    store = engine.TreeStore()
+    for _ in range(count):
+        store.add(-1, *position, 0)
+    results["tree_store_memory"] = metric(store.nbytes() / count, "bytes/nodo", False)
+    engine.reset_game()
+
+def bench_batch(results: Dict[str, object], repeat: int):
+    """Posiciones por segundo de la evaluación vectorizada (requiere NumPy)"""
+    try:
+        import numpy as np
+        import batch
+    except ImportError as e:
+        print(f"Se omite la evaluación por lotes: {e}", file=sys.stderr)
+        return
+    boards = np.random.default_rng(SEED).integers(0, 3, size=(1_000_000, engine.NUM_CELLS), dtype=np.int8)
+    elapsed = best_time(lambda: batch.analyze_batch(boards), repeat)
+    results["analyze_batch"] = metric(len(boards) / elapsed, "posiciones/s", True)
+
+# Posición de 4x4 (4 en raya) con la IA al turno para comparar serie y paralelo
+PARALLEL_BOARD = (4, 4, 4)
+PARALLEL_MOVES = ((0, 0), (1, 1), (0, 1), (2, 2), (3, 3))
+
+def bench_parallel(results: Dict[str, object], repeat: int, workers: int):
+    """Latencia de best_move (alfabeta) en serie y repartiendo la raíz entre procesos"""
+    engine.configure(*PARALLEL_BOARD)
+    b = [[None] * engine.BOARD_COLS for _ in range(engine.BOARD_ROWS)]
+    for i, (row, col) in enumerate(PARALLEL_MOVES):
+        b[row][col] = engine.HUMAN if i % 2 == 0 else engine.AI
+    engine.search_mode = "alfabeta"
+    moves = {}
+    try:
+        for label, processes in (("serie", 0), ("paralelo", workers)):
+            engine.parallel_workers = processes
+            if processes > 1:
+                engine._get_search_pool()  # Arrancar los procesos fuera de la medida
+
+            def run():
+                engine.state_cache.clear()
+                moves[label] = engine.best_move(b)
+
+            elapsed = best_time(run, repeat)
+            results[f"best_move_{label}_4x4"] = metric(elapsed * 1000, "ms", False)
+    finally:
+        engine.parallel_workers = 0
+        engine.shutdown_search_pool()
+        engine.configure()
+    if moves["serie"] != moves["paralelo"]:
+        print(f"Aviso: la búsqueda paralela elige {moves['paralelo']} y la serie {moves['serie']}",
+              file=sys.stderr)
+    speedup = results["best_move_serie_4x4"]["value"] / results["best_move_paralelo_4x4"]["value"]
+    results["parallel_speedup"] = metric(speedup, f"x ({workers} procesos)", True)
+
+# MCTS en un tablero grande (7x7, 4 en raya) con una apertura en el centro
+MCTS_BOARD = (7, 7, 4)
+MCTS_SIMULATIONS = 5000
+
+def bench_mcts(results: Dict[str, object], repeat: int):
+    """Simulaciones por segundo de MCTS con un número fijo de simulaciones"""
+    engine.configure(*MCTS_BOARD)
+    b = [[None] * engine.BOARD_COLS for _ in range(engine.BOARD_ROWS)]
+    b[engine.BOARD_ROWS // 2][engine.BOARD_COLS // 2] = engine.HUMAN
+    previous = engine.mcts_iterations, engine.time_budget_ms
+    engine.search_mode = "mcts"
+    engine.mcts_iterations, engine.time_budget_ms = MCTS_SIMULATIONS, 10 ** 9
+    try:
+        def run():
+            engine.mcts_rng.seed(SEED)
+            engine.best_move(b)
+
+        elapsed = best_time(run, repeat)
+        results["mcts_7x7"] = metric(MCTS_SIMULATIONS / elapsed, "simulaciones/s", True)
+    finally:
+        engine.mcts_iterations, engine.time_budget_ms = previous
+        engine.configure()
+
+def load_ui():
+    """Carga la interfaz sin abrir ventana (controlador de vídeo dummy de SDL)"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    spec = importlib.util.spec_from_file_location("tic_tac_toe_ui", UI_PATH)
+    ui = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(ui)
+    ui.init_ui()
+    return ui
+
+def bench_render(results: Dict[str, object], repeat: int):
+    """Tiempo de fotograma de draw_board y draw_tree con el árbol de una jugada"""
+    try:
+        ui = load_ui()
+    except ImportError as e:
+        print(f"Se omite el dibujo: {e}", file=sys.stderr)
+        return
+
+    frames = 50
+    b = [[None] * engine.BOARD_COLS for _ in range(engine.BOARD_ROWS)]
+    b[0][0] = engine.HUMAN
+    engine.board = b
+    engine.best_move(b)
+    root = engine.tree_nodes[0]
+    ui.add_view_node(root)
+    for child in root.children:
+        ui.add_view_node(child)
+
+    def run(draw):
+        def frames_loop():
+            for _ in range(frames):
+                draw()
+        return frames_loop
+
+    for name, draw in (("draw_board", ui.draw_board), ("draw_tree", ui.draw_tree)):
+        draw()  # Calentar las cachés de texto y mini tableros
+        elapsed = best_time(run(draw), repeat)
+        results[name] = metric(elapsed / frames * 1000, "ms/fotograma", False)
+
+    ui.pygame.quit()
+    engine.state_cache.clear()
+    engine.reset_game()
+
+def run_benchmarks(repeat: int, render: bool, workers: int) -> Dict[str, object]:
+    results = {}
+    bench_rules(results, repeat)
+    bench_minimax(results, repeat)
+    bench_best_move(results, repeat)
+    bench_tree_nodes(results, repeat)
+    bench_batch(results, repeat)
+    bench_mcts(results, repeat)
+    if workers > 1:
+        bench_parallel(results, repeat, workers)
+    if render:
+        bench_render(results, repeat)
+    return {
+        "version": BENCHMARK_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], threshold: float) -> List[str]:
+    """Compara con la base y devuelve las métricas que han empeorado más que el umbral"""
+    regressions = []
+    base_results = baseline.get("results", {})
+    for name, entry in current["results"].items():
+        base = base_results.get(name)
+        if base is None or not base["value"]:
+            continue
+        change = entry["value"] / base["value"] - 1
+        if entry["higher_is_better"]:
+            change = -change
+        entry["change"] = change
+        verdict = "peor" if change > 0 else "mejor"
+        if change > threshold:
+            regressions.append(name)
+            verdict = "REGRESIÓN"
+        print(f"{name:32} {base['value']:12.4g} -> {entry['value']:12.4g} {entry['unit']:13} "
+              f"{abs(change):6.1%} {verdict}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento del 3 en raya")
+    parser.add_argument("--salida", help="fichero JSON donde guardar los resultados")
+    parser.add_argument("--base", default=DEFAULT_BASELINE, help="fichero JSON de referencia")
+    parser.add_argument("--guardar-base", action="store_true",
+                        help="guardar los resultados como nueva referencia")
+    parser.add_argument("--umbral", type=float, default=0.10,
+                        help="empeoramiento relativo tolerado antes de fallar (0.10 = 10%%)")
+    parser.add_argument("--repeticiones", type=int, default=5,
+                        help="ejecuciones por medida (se toma la mejor)")
+    parser.add_argument("--procesos", type=int, default=max(2, os.cpu_count() or 1),
+                        help="procesos de la búsqueda paralela (1 = no medirla)")
+    parser.add_argument("--sin-dibujo", action="store_true", help="no medir el dibujo con pygame")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    current = run_benchmarks(args.repeticiones, not args.sin_dibujo, args.procesos)
+
+    regressions = []
+    if args.guardar_base:
+        with open(args.base, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Base de referencia guardada en {args.base}")
+    elif os.path.exists(args.base):
+        with open(args.base) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.umbral)
+    else:
+        print(f"No hay base de referencia en {args.base} (usar --guardar-base)", file=sys.stderr)
+
+    output = json.dumps(current, indent=2)
+    if args.salida:
+        with open(args.salida, "w") as f:
+            f.write(output)
+    elif not args.guardar_base:
+        print(output)
+
+    if regressions:
+        print(f"{len(regressions)} métricas empeoran más de un {args.umbral:.0%}: {', '.join(regressions)}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
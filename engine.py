@@ -0,0 +1,1477 @@
+"""
+Motor del 3 en raya: tablero, reglas, búsqueda Minimax y tablas de
+posiciones. No depende de pygame, así que se puede importar desde
+scripts, pruebas o trabajos por lotes sin abrir ninguna ventana.
+"""
+import sys
+import os
+import math
+import time
+import mmap
+import struct
+import zlib
+import json
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from array import array
+from typing import Callable, List, Tuple, Optional, Dict
+
+# Dimensiones del tablero y fichas en línea para ganar (ver configure)
+BOARD_ROWS = 3
+BOARD_COLS = 3
+WIN_LENGTH = 3
+
+# Tablero
+board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
+
+# Jugadores
+HUMAN = "X"  # Minimizador
+AI = "O"     # Maximizador
+
+# Valores para Minimax estándar
+WIN_VALUE = 1     # Victoria para el maximizador (IA)
+LOSE_VALUE = -1   # Victoria para el minimizador (Humano)
+DRAW_VALUE = 0    # Empate
+
+# Modos de búsqueda disponibles
+SEARCH_MODES = ("tabla", "minimax", "alfabeta", "iterativa", "mcts")
+search_mode = "tabla"
+
+# Presupuesto de tiempo por jugada para las búsquedas iterativa y mcts (milisegundos)
+time_budget_ms = 1000
+
+# Tipos de entrada en la tabla de transposición
+EXACT = 0        # Valor exacto
+LOWER_BOUND = 1  # Corte beta: el valor real es mayor o igual
+UPPER_BOUND = 2  # Corte alfa: el valor real es menor o igual
+
+# Variables para visualización del árbol
+tree_nodes = []
+tree_edges = []
+current_evaluation = ""
+nodes_visited = 0  # Nodos visitados en la búsqueda actual
+search_depth = 0   # Profundidad completada por la búsqueda iterativa (o alcanzada por MCTS)
+pruned_branches = 0  # Cortes alfa-beta de la búsqueda actual
+
+# Instrumentación: con ella desactivada solo se cuentan nodos y cortes
+instrumentation = False
+max_depth_reached = 0  # Profundidad máxima alcanzada (solo con instrumentación)
+stats_log_path: Optional[str] = None  # Registro JSON lines de cada jugada de la IA
+last_search_stats: Dict[str, object] = {}
+
+# Captura opcional del árbol completo (ver TreeStore)
+capture_tree = False
+tree_store: Optional["TreeStore"] = None
+MAX_CAPTURE_CELLS = 9  # Con más casillas el árbol completo no cabe en memoria
+
+def board_to_tuple(board_state):
+    """Convierte el estado del tablero a un formato hasheable (tupla de tuplas)"""
+    return tuple(tuple(row) for row in board_state)
+
+# Motor bitboard: cada posición son dos enteros (X, O) con un bit por casilla.
+# La casilla (fila, columna) corresponde al bit fila * BOARD_COLS + columna.
+# Las tablas que dependen del tamaño del tablero las calcula _build_tables.
+NUM_CELLS = 0
+FULL_MASK = 0
+WIN_MASKS: List[int] = []
+LINES_THROUGH: List[List[int]] = []
+WINNING = []
+WINNING_TABLE = True  # WINNING es una lista precalculada (si no, un memo; ver last_move_wins)
+SYMMETRIES: List[Tuple[int, ...]] = []
+INVERSE_SYMMETRIES: List[Tuple[int, ...]] = []
+SYMMETRY_TABLES: List[List[int]] = []
+MOVE_ORDER: List[int] = []
+
+# Tableros con más casillas no precalculan tablas de 2^casillas entradas
+MAX_TABLE_CELLS = 12
+
+def _build_win_masks() -> List[int]:
+    """Genera las máscaras ganadoras: todos los segmentos de WIN_LENGTH
+    casillas en horizontal, vertical y ambas diagonales"""
+    masks = []
+    for r in range(BOARD_ROWS):
+        for c in range(BOARD_COLS):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_r = r + dr * (WIN_LENGTH - 1)
+                end_c = c + dc * (WIN_LENGTH - 1)
+                if 0 <= end_r < BOARD_ROWS and 0 <= end_c < BOARD_COLS:
+                    masks.append(sum(1 << ((r + dr * i) * BOARD_COLS + c + dc * i)
+                                     for i in range(WIN_LENGTH)))
+    return masks
+
+class _WinningMemo(dict):
+    """Sustituto perezoso de la tabla WINNING para tableros grandes"""
+
+    def __missing__(self, bits):
+        value = self[bits] = any(bits & mask == mask for mask in WIN_MASKS)
+        return value
+
+def _build_symmetries() -> List[Tuple[int, ...]]:
+    """Genera las simetrías del tablero: 8 (rotaciones y reflejos) si es
+    cuadrado, 4 (reflejos y media vuelta) si es rectangular.
+    Cada simetría es una permutación: la casilla i del tablero transformado
+    toma el valor de la casilla perm[i] del tablero original."""
+    def rotate(r, c):
+        return c, BOARD_ROWS - 1 - r
+
+    def half_turn(r, c):
+        return BOARD_ROWS - 1 - r, BOARD_COLS - 1 - c
+
+    symmetries = []
+    for reflect in (False, True):
+        for turns in range(4):
+            # Las rotaciones de un cuarto de vuelta solo existen en tableros cuadrados
+            if turns % 2 and BOARD_ROWS != BOARD_COLS:
+                continue
+            perm = []
+            for r in range(BOARD_ROWS):
+                for c in range(BOARD_COLS):
+                    src_r, src_c = r, c
+                    if BOARD_ROWS == BOARD_COLS:
+                        for _ in range(turns):
+                            src_r, src_c = rotate(src_r, src_c)
+                    elif turns == 2:
+                        src_r, src_c = half_turn(src_r, src_c)
+                    if reflect:
+                        src_c = BOARD_COLS - 1 - src_c
+                    perm.append(src_r * BOARD_COLS + src_c)
+            symmetries.append(tuple(perm))
+    return symmetries
+
+def _build_symmetry_tables() -> List[List[int]]:
+    """Precalcula, para cada simetría, la imagen de todos los bitboards posibles"""
+    tables = []
+    for inverse in INVERSE_SYMMETRIES:
+        table = [0] * (1 << NUM_CELLS)
+        for bits in range(1, 1 << NUM_CELLS):
+            # Imagen = imagen del resto de bits + imagen del bit más bajo
+            low = bits & -bits
+            table[bits] = table[bits ^ low] | 1 << inverse[low.bit_length() - 1]
+        tables.append(table)
+    return tables
+
+def _build_tables():
+    """Recalcula las tablas del motor para el tamaño de tablero actual"""
+    global NUM_CELLS, FULL_MASK, WIN_MASKS, LINES_THROUGH, WINNING, WINNING_TABLE
+    global SYMMETRIES, INVERSE_SYMMETRIES, SYMMETRY_TABLES, MOVE_ORDER
+    NUM_CELLS = BOARD_ROWS * BOARD_COLS
+    FULL_MASK = (1 << NUM_CELLS) - 1
+    WIN_MASKS = _build_win_masks()
+    # Líneas que pasan por cada casilla
+    LINES_THROUGH = [[mask for mask in WIN_MASKS if mask >> cell & 1] for cell in range(NUM_CELLS)]
+    # WINNING[bits] indica si las fichas de un jugador contienen alguna línea
+    if NUM_CELLS <= MAX_TABLE_CELLS:
+        WINNING = [any(bits & mask == mask for mask in WIN_MASKS) for bits in range(1 << NUM_CELLS)]
+    else:
+        WINNING = _WinningMemo()
+    WINNING_TABLE = isinstance(WINNING, list)
+    SYMMETRIES = _build_symmetries()
+    # Inversa de cada simetría: casilla original -> casilla transformada
+    INVERSE_SYMMETRIES = [tuple(perm.index(i) for i in range(NUM_CELLS)) for perm in SYMMETRIES]
+    SYMMETRY_TABLES = _build_symmetry_tables() if NUM_CELLS <= MAX_TABLE_CELLS else []
+    # Orden de exploración: primero las casillas por las que pasan más líneas
+    # (en 3x3: centro, esquinas y bordes)
+    MOVE_ORDER = sorted(range(NUM_CELLS), key=lambda cell: -len(LINES_THROUGH[cell]))
+    _canonical_memo.clear()
+
+def board_to_bits(board_state) -> Tuple[int, int]:
+    """Convierte un tablero de listas a la pareja de bitboards (X, O)"""
+    x_bits = o_bits = 0
+    bit = 1
+    for row in board_state:
+        for cell in row:
+            if cell == HUMAN:
+                x_bits |= bit
+            elif cell == AI:
+                o_bits |= bit
+            bit <<= 1
+    return x_bits, o_bits
+
+def bits_to_board(x_bits: int, o_bits: int) -> List[List[Optional[str]]]:
+    """Convierte una pareja de bitboards (X, O) a un tablero de listas"""
+    b = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
+    for cell in range(NUM_CELLS):
+        if x_bits >> cell & 1:
+            b[cell // BOARD_COLS][cell % BOARD_COLS] = HUMAN
+        elif o_bits >> cell & 1:
+            b[cell // BOARD_COLS][cell % BOARD_COLS] = AI
+    return b
+
+def bits_winner(x_bits: int, o_bits: int) -> Optional[str]:
+    """Comprueba si hay un ganador en una posición bitboard"""
+    if WINNING[x_bits]:
+        return HUMAN
+    if WINNING[o_bits]:
+        return AI
+    return None
+
+def bits_moves(x_bits: int, o_bits: int) -> List[int]:
+    """Devuelve las casillas vacías (índices de bit) en orden de fila"""
+    empty = FULL_MASK & ~(x_bits | o_bits)
+    moves = []
+    while empty:
+        bit = empty & -empty
+        moves.append(bit.bit_length() - 1)
+        empty ^= bit
+    return moves
+
+def _apply_symmetry(bits: int, inverse: Tuple[int, ...]) -> int:
+    """Transforma un bitboard bit a bit (tableros sin tablas precalculadas)"""
+    image = 0
+    while bits:
+        low = bits & -bits
+        image |= 1 << inverse[low.bit_length() - 1]
+        bits ^= low
+    return image
+
+# Memo de claves canónicas (solo en tableros con tablas precalculadas)
+_canonical_memo: Dict[int, Tuple[int, int]] = {}
+
+def canonical_key(x_bits: int, o_bits: int) -> Tuple[int, int]:
+    """Devuelve la clave canónica de la posición (la menor de sus simetrías)
+    y el índice de la simetría que la produce"""
+    raw = x_bits << NUM_CELLS | o_bits
+    result = _canonical_memo.get(raw)
+    if result is None:
+        best_key, best_sym = -1, 0
+        if SYMMETRY_TABLES:
+            for sym, table in enumerate(SYMMETRY_TABLES):
+                key = table[x_bits] << NUM_CELLS | table[o_bits]
+                if best_key < 0 or key < best_key:
+                    best_key, best_sym = key, sym
+            _canonical_memo[raw] = (best_key, best_sym)
+        else:
+            for sym, inverse in enumerate(INVERSE_SYMMETRIES):
+                key = _apply_symmetry(x_bits, inverse) << NUM_CELLS | _apply_symmetry(o_bits, inverse)
+                if best_key < 0 or key < best_key:
+                    best_key, best_sym = key, sym
+        result = (best_key, best_sym)
+    return result
+
+_build_tables()
+
+class TranspositionTable:
+    """Tabla de transposición: guarda el valor Minimax, el turno y el mejor
+    movimiento de cada posición, compartiendo entrada entre posiciones simétricas"""
+
+    def __init__(self):
+        self.entries: Dict[Tuple[int, bool], Tuple[float, bool, Optional[int], int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0  # Cambia al vaciarla (ver _search_root_child)
+
+    def lookup(self, x_bits: int, o_bits: int, is_maximizing: bool) -> Optional[Tuple[float, Optional[int], int]]:
+        """Devuelve (valor, mejor casilla, tipo de entrada) si la posición ya fue evaluada"""
+        key, sym = canonical_key(x_bits, o_bits)
+        entry = self.entries.get((key, is_maximizing))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        value, _, canon_move, flag = entry
+        move = None
+        if canon_move is not None:
+            # Deshacer la simetría para volver a coordenadas del tablero real
+            move = SYMMETRIES[sym][canon_move]
+        return value, move, flag
+
+    def store(self, x_bits: int, o_bits: int, is_maximizing: bool, value: float,
+              move: Optional[int] = None, flag: int = EXACT):
+        """Guarda el valor de una posición (y su mejor casilla, si la hay)"""
+        key, sym = canonical_key(x_bits, o_bits)
+        canon_move = None if move is None else INVERSE_SYMMETRIES[sym][move]
+        self.entries[(key, is_maximizing)] = (value, is_maximizing, canon_move, flag)
+
+    def merge(self, entries):
+        """Incorpora entradas de otra tabla sin sustituir valores exactos por cotas"""
+        for key, entry in entries:
+            current = self.entries.get(key)
+            if current is None or current[3] != EXACT or entry[3] == EXACT:
+                self.entries[key] = entry
+
+    def clear(self):
+        """Vacía la tabla y reinicia los contadores"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.generation += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+# Tabla de transposición compartida entre turnos (el valor de una posición
+# no depende de la partida, así que no hace falta vaciarla)
+state_cache = TranspositionTable()
+
+# Tabla de posiciones resueltas (solo para el tablero estándar 3x3 con 3 en
+# raya): una entrada de 16 bits por cada una de las 3^9 codificaciones en
+# base 3 del tablero. Bits 0-8: casillas óptimas; bits 9-10: valor
+# (0 = posición no alcanzable, 1 = -1, 2 = 0, 3 = 1).
+SOLVED_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solved_positions.bin")
+SOLVED_TABLE_MAGIC = b"TTTS"
+SOLVED_TABLE_VERSION = 1
+SOLVED_TABLE_HEADER = struct.Struct("<4sHII")  # magia, versión, entradas, crc32
+SOLVED_CELLS = 9
+NUM_POSITIONS = 3 ** SOLVED_CELLS
+VALUE_CODES = {LOSE_VALUE: 1, DRAW_VALUE: 2, WIN_VALUE: 3}
+CODE_VALUES = {1: LOSE_VALUE, 2: DRAW_VALUE, 3: WIN_VALUE}
+
+# TERNARY[bits]: suma de 3^i por cada casilla i ocupada en el bitboard
+TERNARY = [0] * (1 << SOLVED_CELLS)
+# POPCOUNT[bits]: número de fichas del bitboard
+POPCOUNT = [0] * (1 << SOLVED_CELLS)
+for _bits in range(1, 1 << SOLVED_CELLS):
+    _low = _bits & -_bits
+    TERNARY[_bits] = TERNARY[_bits ^ _low] + 3 ** (_low.bit_length() - 1)
+    POPCOUNT[_bits] = POPCOUNT[_bits ^ _low] + 1
+
+def position_index(x_bits: int, o_bits: int) -> int:
+    """Índice de la posición en la tabla resuelta (codificación en base 3)"""
+    return TERNARY[x_bits] + 2 * TERNARY[o_bits]
+
+def solve_game() -> array:
+    """Resuelve el juego completo: recorre todas las posiciones alcanzables
+    (empezando X) y guarda su valor Minimax y sus movimientos óptimos"""
+    entries = array("H", bytes(2 * NUM_POSITIONS))
+
+    def solve(x_bits, o_bits):
+        index = position_index(x_bits, o_bits)
+        if entries[index]:
+            return CODE_VALUES[entries[index] >> SOLVED_CELLS]
+        
+        optimal = 0
+        if WINNING[o_bits]:
+            value = WIN_VALUE
+        elif WINNING[x_bits]:
+            value = LOSE_VALUE
+        elif x_bits | o_bits == FULL_MASK:
+            value = DRAW_VALUE
+        else:
+            x_to_move = POPCOUNT[x_bits] == POPCOUNT[o_bits]
+            child_values = {}
+            for cell in bits_moves(x_bits, o_bits):
+                if x_to_move:
+                    child_values[cell] = solve(x_bits | 1 << cell, o_bits)
+                else:
+                    child_values[cell] = solve(x_bits, o_bits | 1 << cell)
+            value = min(child_values.values()) if x_to_move else max(child_values.values())
+            for cell, child_value in child_values.items():
+                if child_value == value:
+                    optimal |= 1 << cell
+        
+        entries[index] = VALUE_CODES[value] << SOLVED_CELLS | optimal
+        return value
+
+    solve(0, 0)
+    return entries
+
+class SolvedTable:
+    """Tabla de posiciones resueltas: valor y movimientos óptimos en O(1)"""
+
+    def __init__(self, entries):
+        self.entries = entries  # memoryview sobre el fichero mapeado o array en memoria
+
+    def lookup(self, x_bits: int, o_bits: int, is_maximizing: bool) -> Optional[Tuple[float, int]]:
+        """Devuelve (valor, máscara de casillas óptimas), o None si la posición
+        no es alcanzable o no le toca mover al jugador indicado"""
+        # En la tabla siempre empieza X (Humano, minimizador)
+        if (POPCOUNT[x_bits] == POPCOUNT[o_bits]) == is_maximizing:
+            return None
+        entry = self.entries[position_index(x_bits, o_bits)]
+        if not entry:
+            return None
+        return CODE_VALUES[entry >> SOLVED_CELLS], entry & FULL_MASK
+
+    def __len__(self):
+        return sum(1 for entry in self.entries if entry)
+
+def write_solved_table(path: str, entries: array):
+    """Escribe la tabla resuelta en disco de forma atómica"""
+    payload = array("H", entries)
+    if sys.byteorder != "little":
+        payload.byteswap()
+    payload = payload.tobytes()
+    header = SOLVED_TABLE_HEADER.pack(SOLVED_TABLE_MAGIC, SOLVED_TABLE_VERSION,
+                                      len(entries), zlib.crc32(payload))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+def read_solved_table(path: str):
+    """Lee y valida la tabla resuelta; la mapea en memoria si es posible.
+    Lanza ValueError si el fichero es de otra versión o está corrupto."""
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            data = f.read()
+    if len(data) < SOLVED_TABLE_HEADER.size:
+        raise ValueError("tabla resuelta truncada")
+    magic, version, count, checksum = SOLVED_TABLE_HEADER.unpack_from(data)
+    if magic != SOLVED_TABLE_MAGIC or version != SOLVED_TABLE_VERSION or count != NUM_POSITIONS:
+        raise ValueError("tabla resuelta de otra versión")
+    payload = memoryview(data)[SOLVED_TABLE_HEADER.size:]
+    if len(payload) != 2 * count or zlib.crc32(payload) != checksum:
+        raise ValueError("tabla resuelta corrupta")
+    if sys.byteorder == "little":
+        return payload.cast("H")
+    entries = array("H", payload.tobytes())
+    entries.byteswap()
+    return entries
+
+def load_solved_table(path: str = SOLVED_TABLE_PATH) -> SolvedTable:
+    """Carga la tabla resuelta desde disco, regenerándola si falta o no es válida"""
+    try:
+        return SolvedTable(read_solved_table(path))
+    except (OSError, ValueError):
+        pass
+    entries = solve_game()
+    try:
+        write_solved_table(path, entries)
+    except OSError:
+        pass  # Sin permisos de escritura: se usa solo en memoria
+    return SolvedTable(entries)
+
+solved_table: Optional[SolvedTable] = None
+
+def is_standard_board() -> bool:
+    """Indica si se juega el 3 en raya clásico (3x3, tres en línea)"""
+    return (BOARD_ROWS, BOARD_COLS, WIN_LENGTH) == (3, 3, 3)
+
+def get_solved_table() -> Optional[SolvedTable]:
+    """Devuelve la tabla resuelta, cargándola (o generándola) la primera vez.
+    En tableros que no son el estándar no hay tabla y devuelve None."""
+    global solved_table
+    if not is_standard_board():
+        return None
+    if solved_table is None:
+        solved_table = load_solved_table()
+    return solved_table
+
+class TreeNode:
+    def __init__(self, position, value, depth, is_maximizing, move=None):
+        self.position = position  # Bitboards (X, O), sin copiar listas
+        self.value = value
+        self.depth = depth
+        self.is_maximizing = is_maximizing
+        self.move = move  # Último movimiento que llevó a este estado (fila, columna)
+        self.parent = None
+        self.children = []
+        self.nodes = 0  # Nodos visitados al evaluar este subárbol
+        self.pos = (0, 0)  # Posición en el árbol dibujado
+        self.id = len(tree_nodes)
+        # Contador de victorias/derrotas/empates para este nodo
+        self.wins = 0      # Victorias para IA
+        self.losses = 0    # Victorias para Humano
+        self.draws = 0     # Empates
+        # Estado terminal (se clasifica una sola vez, al crear el nodo)
+        self.is_terminal = False
+        self.terminal_type = None  # "win", "loss", "draw"
+        x_bits, o_bits = position
+        if WINNING[o_bits]:
+            self.is_terminal, self.terminal_type, self.wins = True, "win", 1
+        elif WINNING[x_bits]:
+            self.is_terminal, self.terminal_type, self.losses = True, "loss", 1
+        elif x_bits | o_bits == FULL_MASK:
+            self.is_terminal, self.terminal_type, self.draws = True, "draw", 1
+        tree_nodes.append(self)
+
+    @property
+    def board_state(self):
+        """Tablero de listas equivalente (solo para dibujar)"""
+        return bits_to_board(*self.position)
+
+    def _propagate(self, wins, losses, draws):
+        """Suma los recuentos a todos los antecesores (sin recursión)"""
+        node = self.parent
+        while node is not None:
+            node.wins += wins
+            node.losses += losses
+            node.draws += draws
+            node = node.parent
+
+    def add_child(self, child):
+        child.parent = self
+        self.children.append(child)
+        tree_edges.append((self.id, child.id))
+        # Los finales ya contados en el subárbol del hijo suben hasta la raíz
+        self.wins += child.wins
+        self.losses += child.losses
+        self.draws += child.draws
+        self._propagate(child.wins, child.losses, child.draws)
+
+    def set_counts(self, wins, losses, draws):
+        """Fija los recuentos de un nodo hoja (por ejemplo, desde el árbol
+        capturado) y actualiza sus antecesores con la diferencia"""
+        self._propagate(wins - self.wins, losses - self.losses, draws - self.draws)
+        self.wins, self.losses, self.draws = wins, losses, draws
+        
+    def analyze_terminal_states(self):
+        """Recalcula los recuentos del subárbol en postorden iterativo: cada
+        nodo interno suma los de sus hijos y las hojas conservan los suyos"""
+        stack = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not node.children:
+                continue
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children)
+                continue
+            node.wins = sum(child.wins for child in node.children)
+            node.losses = sum(child.losses for child in node.children)
+            node.draws = sum(child.draws for child in node.children)
+        return self.wins, self.losses, self.draws
+
+class TreeStore:
+    """Árbol de búsqueda completo en estructura de arrays.
+    Cada nodo es un índice en buffers compactos (unos 30 bytes por nodo en
+    lugar de un objeto TreeNode). Los nodos se guardan en preorden: los hijos
+    de i empiezan en i + 1 y cada subárbol termina en subtree_end[i]."""
+    def __init__(self):
+        self.parent = array('i')       # Índice del padre (-1 en la raíz)
+        self.board = array('Q')        # Tablero empaquetado: X | O << NUM_CELLS
+        self.value = array('b')        # Valor minimax del nodo
+        self.depth = array('B')
+        self.move = array('b')         # Casilla jugada para llegar (-1 en la raíz)
+        self.subtree_end = array('i')  # Primer índice fuera del subárbol
+        self.wins = array('I')
+        self.losses = array('I')
+        self.draws = array('I')
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add(self, parent: int, x_bits: int, o_bits: int, depth: int, move: int = -1) -> int:
+        """Añade un nodo vacío y devuelve su índice"""
+        index = len(self.parent)
+        self.parent.append(parent)
+        self.board.append(x_bits | o_bits << NUM_CELLS)
+        self.value.append(0)
+        self.depth.append(depth)
+        self.move.append(move)
+        self.subtree_end.append(index + 1)
+        self.wins.append(0)
+        self.losses.append(0)
+        self.draws.append(0)
+        return index
+
+    def position(self, index: int) -> Tuple[int, int]:
+        """Bitboards (X, O) del nodo"""
+        packed = self.board[index]
+        return packed & FULL_MASK, packed >> NUM_CELLS
+
+    def children(self, index: int) -> List[int]:
+        """Índices de los hijos directos del nodo"""
+        result = []
+        child, end = index + 1, self.subtree_end[index]
+        while child < end:
+            result.append(child)
+            child = self.subtree_end[child]
+        return result
+
+    def nbytes(self) -> int:
+        """Memoria ocupada por los buffers"""
+        return sum(len(buffer) * buffer.itemsize for buffer in
+                   (self.parent, self.board, self.value, self.depth, self.move,
+                    self.subtree_end, self.wins, self.losses, self.draws))
+
+def check_winner(b: List[List[Optional[str]]]) -> Optional[str]:
+    """Comprueba si hay un ganador"""
+    return bits_winner(*board_to_bits(b))
+
+def is_full(b: List[List[Optional[str]]]) -> bool:
+    """Comprueba si el tablero está lleno"""
+    x_bits, o_bits = board_to_bits(b)
+    return x_bits | o_bits == FULL_MASK
+
+def get_available_moves(b: List[List[Optional[str]]]) -> List[Tuple[int, int]]:
+    """Devuelve una lista de casillas vacías en el tablero"""
+    return [(cell // BOARD_COLS, cell % BOARD_COLS) for cell in bits_moves(*board_to_bits(b))]
+
+def order_moves(x_bits: int, o_bits: int, hint: Optional[int] = None) -> List[int]:
+    """Ordena las casillas vacías para la poda: primero el mejor movimiento
+    guardado en la tabla, después el centro, las esquinas y los bordes"""
+    occupied = x_bits | o_bits
+    moves = [cell for cell in MOVE_ORDER if not occupied >> cell & 1]
+    if hint is not None:
+        moves.remove(hint)
+        moves.insert(0, hint)
+    return moves
+
+def last_move_wins(x_bits: int, o_bits: int, is_maximizing: bool, last_bit: int) -> bool:
+    """Comprueba si la última ficha (last_bit, del jugador que no está al
+    turno) ha completado una línea. Solo puede haber ganado quien acaba de
+    mover: con tablero pequeño basta una consulta a WINNING, y en los
+    grandes se miran solo las líneas que pasan por esa casilla."""
+    mover = x_bits if is_maximizing else o_bits
+    if WINNING_TABLE:
+        return WINNING[mover]
+    return completes_line(mover, last_bit.bit_length() - 1)
+
+def minimax_bits(x_bits: int, o_bits: int, depth: int, is_maximizing: bool,
+                 last_bit: int = 0) -> float:
+    """
+    Minimax completo (sin poda alfa-beta) sobre bitboards.
+    last_bit es la casilla (como bit) de la última jugada, o 0 si no se conoce.
+    """
+    global nodes_visited, max_depth_reached
+    nodes_visited += 1
+    if instrumentation and depth > max_depth_reached:
+        max_depth_reached = depth
+    
+    # Comprobar estado terminal
+    if last_bit:
+        if last_move_wins(x_bits, o_bits, is_maximizing, last_bit):
+            return LOSE_VALUE if is_maximizing else WIN_VALUE
+    elif WINNING[o_bits]:  # Victoria para IA (Maximizador)
+        return WIN_VALUE
+    elif WINNING[x_bits]:  # Victoria para Humano (Minimizador)
+        return LOSE_VALUE
+    occupied = x_bits | o_bits
+    if occupied == FULL_MASK:  # Empate
+        return DRAW_VALUE
+    
+    # Consultar la tabla de transposición
+    cached = state_cache.lookup(x_bits, o_bits, is_maximizing)
+    if cached is not None and cached[2] == EXACT:
+        return cached[0]
+    
+    empty = FULL_MASK ^ occupied
+    best = None
+    
+    if is_maximizing:  # Turno de la IA (Maximizador)
+        best_value = -math.inf
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            eval_value = minimax_bits(x_bits, o_bits | bit, depth + 1, False, bit)
+            if eval_value > best_value:
+                best_value, best = eval_value, bit
+    else:  # Turno del Humano (Minimizador)
+        best_value = math.inf
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            eval_value = minimax_bits(x_bits | bit, o_bits, depth + 1, True, bit)
+            if eval_value < best_value:
+                best_value, best = eval_value, bit
+    
+    state_cache.store(x_bits, o_bits, is_maximizing, best_value, best.bit_length() - 1)
+    return best_value
+
+def alphabeta_bits(x_bits: int, o_bits: int, depth: int, is_maximizing: bool,
+                   alpha: float = -math.inf, beta: float = math.inf, last_bit: int = 0) -> float:
+    """
+    Minimax con poda alfa-beta y ordenación de movimientos sobre bitboards
+    """
+    global nodes_visited, pruned_branches, max_depth_reached
+    nodes_visited += 1
+    if instrumentation and depth > max_depth_reached:
+        max_depth_reached = depth
+    
+    # Comprobar estado terminal
+    if last_bit:
+        if last_move_wins(x_bits, o_bits, is_maximizing, last_bit):
+            return LOSE_VALUE if is_maximizing else WIN_VALUE
+    elif WINNING[o_bits]:
+        return WIN_VALUE
+    elif WINNING[x_bits]:
+        return LOSE_VALUE
+    if x_bits | o_bits == FULL_MASK:
+        return DRAW_VALUE
+    
+    # Consultar la tabla de transposición (puede guardar una cota)
+    alpha_orig, beta_orig = alpha, beta
+    hint = None
+    cached = state_cache.lookup(x_bits, o_bits, is_maximizing)
+    if cached is not None:
+        value, hint, flag = cached
+        if flag == EXACT:
+            return value
+        elif flag == LOWER_BOUND:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+    
+    best = None
+    
+    if is_maximizing:
+        best_value = -math.inf
+        for cell in order_moves(x_bits, o_bits, hint):
+            bit = 1 << cell
+            eval_value = alphabeta_bits(x_bits, o_bits | bit, depth + 1, False, alpha, beta, bit)
+            if eval_value > best_value:
+                best_value, best = eval_value, cell
+            alpha = max(alpha, eval_value)
+            if alpha >= beta:
+                pruned_branches += 1
+                break  # Poda beta
+    else:
+        best_value = math.inf
+        for cell in order_moves(x_bits, o_bits, hint):
+            bit = 1 << cell
+            eval_value = alphabeta_bits(x_bits | bit, o_bits, depth + 1, True, alpha, beta, bit)
+            if eval_value < best_value:
+                best_value, best = eval_value, cell
+            beta = min(beta, eval_value)
+            if alpha >= beta:
+                pruned_branches += 1
+                break  # Poda alfa
+    
+    # Guardar el resultado indicando si es exacto o solo una cota
+    if best_value <= alpha_orig:
+        flag = UPPER_BOUND
+    elif best_value >= beta_orig:
+        flag = LOWER_BOUND
+    else:
+        flag = EXACT
+    state_cache.store(x_bits, o_bits, is_maximizing, best_value, best, flag)
+    return best_value
+
+def minimax(b: List[List[Optional[str]]], depth: int, is_maximizing: bool) -> float:
+    """
+    Implementación del algoritmo Minimax sin poda alfa-beta
+    """
+    return minimax_bits(*board_to_bits(b), depth, is_maximizing)
+
+def alphabeta(b: List[List[Optional[str]]], depth: int, is_maximizing: bool,
+              alpha: float = -math.inf, beta: float = math.inf) -> float:
+    """
+    Minimax con poda alfa-beta y ordenación de movimientos
+    """
+    return alphabeta_bits(*board_to_bits(b), depth, is_maximizing, alpha, beta)
+
+def _walk_enter(stack: list, enter: Callable[[int, int, int, int, int], int], parent: int,
+                x_bits: int, o_bits: int, is_maximizing: bool, depth: int, move: int):
+    """Abre un nodo de walk_tree: si es terminal devuelve su registro; si no,
+    lo apila con sus jugadas pendientes y devuelve None"""
+    node_id = enter(parent, x_bits, o_bits, depth, move)
+    
+    # Estados terminales (si se conoce la jugada, solo puede haber ganado quien la hizo)
+    if move >= 0:
+        winner = None
+        if last_move_wins(x_bits, o_bits, is_maximizing, 1 << move):
+            winner = HUMAN if is_maximizing else AI
+    else:
+        winner = bits_winner(x_bits, o_bits)
+    if winner == AI:
+        return (node_id, parent, x_bits, o_bits, depth, move, WIN_VALUE, 1, 0, 0)
+    if winner == HUMAN:
+        return (node_id, parent, x_bits, o_bits, depth, move, LOSE_VALUE, 0, 1, 0)
+    if x_bits | o_bits == FULL_MASK:
+        return (node_id, parent, x_bits, o_bits, depth, move, DRAW_VALUE, 0, 0, 1)
+    moves = bits_moves(x_bits, o_bits)
+    moves.reverse()  # Se sacan por el final, en orden de fila
+    best = LOSE_VALUE if is_maximizing else WIN_VALUE
+    stack.append([node_id, parent, x_bits, o_bits, is_maximizing, depth, move, moves, best, 0, 0, 0])
+    return None
+
+def walk_tree(x_bits: int, o_bits: int, is_maximizing: bool, depth: int = 0, move: int = -1,
+              parent: int = -1, enter: Optional[Callable[[int, int, int, int, int], int]] = None):
+    """
+    Recorre el árbol Minimax completo desde (x_bits, o_bits), sin poda ni
+    tabla de transposición. enter(padre, X, O, profundidad, casilla) se
+    llama al entrar en cada nodo (en preorden) y devuelve su identificador;
+    por defecto se numeran desde 0. Cada nodo se produce en postorden, cuando
+    ya se conocen su valor y el recuento de finales de su subárbol, como
+    (id, padre, X, O, profundidad, casilla, valor, victorias, derrotas,
+    empates). Solo se guarda la pila del recorrido (una entrada por nivel).
+    """
+    if enter is None:
+        ids = itertools.count()
+        enter = lambda *node: next(ids)
+    # Pila de nodos abiertos: [id, padre, X, O, turno de la IA, profundidad, casilla,
+    #                          jugadas pendientes, valor, victorias, derrotas, empates]
+    stack = []
+    record = _walk_enter(stack, enter, parent, x_bits, o_bits, is_maximizing, depth, move)
+    while True:
+        if record is None:
+            frame = stack[-1]
+            if frame[7]:
+                # Bajar al siguiente hijo del nodo abierto
+                cell = frame[7].pop()
+                x, o, maximizing = frame[2], frame[3], frame[4]
+                if maximizing:
+                    o |= 1 << cell
+                else:
+                    x |= 1 << cell
+                record = _walk_enter(stack, enter, frame[0], x, o, not maximizing, frame[5] + 1, cell)
+                continue
+            # Todos sus hijos han terminado: el nodo está completo
+            stack.pop()
+            record = (frame[0], frame[1], frame[2], frame[3], frame[5], frame[6],
+                      frame[8], frame[9], frame[10], frame[11])
+        
+        yield record
+        if not stack:
+            return
+        # Acumular el nodo terminado en su padre
+        frame = stack[-1]
+        value = record[6]
+        if frame[4]:
+            if value > frame[8]:
+                frame[8] = value
+        elif value < frame[8]:
+            frame[8] = value
+        frame[9] += record[7]
+        frame[10] += record[8]
+        frame[11] += record[9]
+        record = None
+
+def capture_search(store: TreeStore, x_bits: int, o_bits: int, depth: int,
+                   is_maximizing: bool, parent: int = -1, move: int = -1) -> int:
+    """
+    Minimax completo sin tabla de transposición que guarda cada nodo visitado
+    en store, junto con su valor y el recuento de finales de su subárbol.
+    Devuelve el índice del nodo.
+    """
+    value, wins, losses, draws, subtree_end = store.value, store.wins, store.losses, store.draws, store.subtree_end
+    for record in walk_tree(x_bits, o_bits, is_maximizing, depth, move, parent, store.add):
+        index = record[0]
+        value[index] = record[6]
+        wins[index], losses[index], draws[index] = record[7], record[8], record[9]
+        subtree_end[index] = len(store)
+    return index
+
+def search_bits(x_bits: int, o_bits: int, depth: int, is_maximizing: bool,
+                last_bit: int = 0, mode: Optional[str] = None) -> float:
+    """Evalúa una posición bitboard con el modo de búsqueda mode (por
+    defecto, search_mode). last_bit es la última jugada, para comprobar
+    solo las líneas que la cruzan."""
+    if mode is None:
+        mode = search_mode
+    if mode == "tabla":
+        # Consulta O(1); si la posición no está en la tabla se busca con poda
+        table = get_solved_table()
+        solved = table.lookup(x_bits, o_bits, is_maximizing) if table is not None else None
+        if solved is not None:
+            return solved[0]
+    if mode == "minimax":
+        return minimax_bits(x_bits, o_bits, depth, is_maximizing, last_bit)
+    return alphabeta_bits(x_bits, o_bits, depth, is_maximizing, last_bit=last_bit)
+
+def search(b: List[List[Optional[str]]], depth: int, is_maximizing: bool) -> float:
+    """Evalúa una posición con el modo de búsqueda seleccionado"""
+    return search_bits(*board_to_bits(b), depth, is_maximizing)
+
+class SearchTimeout(Exception):
+    """La búsqueda ha agotado su presupuesto de tiempo"""
+
+def completes_line(bits: int, cell: int) -> bool:
+    """Comprueba si la ficha recién puesta en cell completa alguna línea"""
+    for mask in LINES_THROUGH[cell]:
+        if bits & mask == mask:
+            return True
+    return False
+
+def evaluate(x_bits: int, o_bits: int) -> float:
+    """Evaluación heurística de líneas abiertas, estrictamente entre -1 y 1.
+    Cada línea con fichas de un solo jugador suma 4^(fichas - 1) a su favor."""
+    score = 0
+    for mask in WIN_MASKS:
+        x_line = x_bits & mask
+        o_line = o_bits & mask
+        if o_line and not x_line:
+            score += 4 ** (bin(o_line).count("1") - 1)
+        elif x_line and not o_line:
+            score -= 4 ** (bin(x_line).count("1") - 1)
+    return score / (abs(score) + 4 ** WIN_LENGTH)
+
+def depth_limited(x_bits: int, o_bits: int, depth: int, is_maximizing: bool,
+                  alpha: float, beta: float, deadline: float,
+                  should_stop: Optional[Callable[[], bool]] = None) -> float:
+    """
+    Alfa-beta limitado a depth jugadas; en el horizonte usa evaluate.
+    Lanza SearchTimeout si se supera deadline o si should_stop devuelve True.
+    """
+    global nodes_visited, pruned_branches
+    nodes_visited += 1
+    if not nodes_visited & 1023:
+        if time.perf_counter() > deadline or (should_stop is not None and should_stop()):
+            raise SearchTimeout
+    
+    if x_bits | o_bits == FULL_MASK:
+        return DRAW_VALUE
+    if depth == 0:
+        return evaluate(x_bits, o_bits)
+    
+    if is_maximizing:
+        best_value = -math.inf
+        for cell in order_moves(x_bits, o_bits):
+            child = o_bits | 1 << cell
+            if completes_line(child, cell):
+                return WIN_VALUE
+            eval_value = depth_limited(x_bits, child, depth - 1, False, alpha, beta, deadline, should_stop)
+            best_value = max(best_value, eval_value)
+            alpha = max(alpha, eval_value)
+            if alpha >= beta:
+                pruned_branches += 1
+                break  # Poda beta
+    else:
+        best_value = math.inf
+        for cell in order_moves(x_bits, o_bits):
+            child = x_bits | 1 << cell
+            if completes_line(child, cell):
+                return LOSE_VALUE
+            eval_value = depth_limited(child, o_bits, depth - 1, True, alpha, beta, deadline, should_stop)
+            best_value = min(best_value, eval_value)
+            beta = min(beta, eval_value)
+            if alpha >= beta:
+                pruned_branches += 1
+                break  # Poda alfa
+    return best_value
+
+def iterative_deepening(x_bits: int, o_bits: int, budget_ms: float,
+                        should_stop: Optional[Callable[[], bool]] = None) -> Tuple[Dict[int, float], int]:
+    """
+    Búsqueda por profundización iterativa para la IA con presupuesto de tiempo
+    (se interrumpe antes si should_stop devuelve True).
+    Devuelve la puntuación de cada jugada de la raíz según la última
+    profundidad completada, y esa profundidad (0 = solo evaluación estática).
+    """
+    deadline = time.perf_counter() + budget_ms / 1000
+    moves = order_moves(x_bits, o_bits)
+    
+    # Sin tiempo ni para la profundidad 1 se usa la evaluación estática
+    root_scores = {}
+    for cell in moves:
+        child = o_bits | 1 << cell
+        root_scores[cell] = WIN_VALUE if completes_line(child, cell) else evaluate(x_bits, child)
+    completed = 0
+    
+    for depth in range(1, len(moves) + 1):
+        scores = {}
+        try:
+            for cell in moves:
+                child = o_bits | 1 << cell
+                if completes_line(child, cell):
+                    scores[cell] = WIN_VALUE
+                else:
+                    scores[cell] = depth_limited(x_bits, child, depth - 1, False,
+                                                 -math.inf, math.inf, deadline, should_stop)
+        except SearchTimeout:
+            break  # Se conserva la última profundidad completa
+        root_scores, completed = scores, depth
+        if WIN_VALUE in scores.values():
+            break  # Victoria forzada: no hace falta mirar más lejos
+        # La siguiente iteración empieza por las jugadas mejor valoradas
+        moves.sort(key=lambda cell: -scores[cell])
+    
+    return root_scores, completed
+
+# Búsqueda Monte Carlo en árbol (UCT), alternativa a Minimax en tableros grandes
+mcts_iterations = 20000  # Simulaciones máximas por jugada (además de time_budget_ms)
+MCTS_EXPLORATION = math.sqrt(2)  # Constante c de UCT
+mcts_rng = random.Random()
+
+class MCTSPool:
+    """Nodos del árbol de MCTS en listas paralelas. Cada nodo es un índice y
+    el pool conserva su capacidad entre búsquedas: clear solo reinicia el
+    tamaño, así que las simulaciones no crean objetos por nodo."""
+    def __init__(self):
+        self.parent = []
+        self.move = []      # Casilla jugada para llegar (-1 en la raíz)
+        self.x_bits = []
+        self.o_bits = []
+        self.result = []    # Valor del estado terminal, o None
+        self.untried = []   # Máscara de jugadas aún sin expandir
+        self.children = []  # Índices de los hijos expandidos
+        self.visits = []
+        self.wins = []      # Simulaciones ganadas por la IA
+        self.losses = []    # Simulaciones ganadas por el humano
+        self.draws = []
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def clear(self):
+        self.size = 0
+
+    def add(self, parent: int, move: int, x_bits: int, o_bits: int, result: Optional[int]) -> int:
+        """Añade un nodo sin visitas (reutilizando un hueco si lo hay) y devuelve su índice"""
+        index = self.size
+        untried = 0 if result is not None else FULL_MASK & ~(x_bits | o_bits)
+        if index == len(self.parent):
+            self.parent.append(parent)
+            self.move.append(move)
+            self.x_bits.append(x_bits)
+            self.o_bits.append(o_bits)
+            self.result.append(result)
+            self.untried.append(untried)
+            self.children.append([])
+            self.visits.append(0)
+            self.wins.append(0)
+            self.losses.append(0)
+            self.draws.append(0)
+        else:
+            self.parent[index] = parent
+            self.move[index] = move
+            self.x_bits[index] = x_bits
+            self.o_bits[index] = o_bits
+            self.result[index] = result
+            self.untried[index] = untried
+            self.children[index].clear()
+            self.visits[index] = self.wins[index] = self.losses[index] = self.draws[index] = 0
+        self.size += 1
+        return index
+
+mcts_pool = MCTSPool()
+
+def _move_result(x_bits: int, o_bits: int, cell: int, ai_moved: bool) -> Optional[int]:
+    """Valor del estado tras jugar en cell, o None si la partida sigue"""
+    mover = o_bits if ai_moved else x_bits
+    if WINNING[mover] if WINNING_TABLE else completes_line(mover, cell):
+        return WIN_VALUE if ai_moved else LOSE_VALUE
+    if x_bits | o_bits == FULL_MASK:
+        return DRAW_VALUE
+    return None
+
+def rollout(x_bits: int, o_bits: int, ai_turn: bool) -> int:
+    """Termina la partida con jugadas al azar y devuelve su resultado.
+    Barajar las casillas libres una vez equivale a elegir cada jugada al azar."""
+    cells = [cell for cell in range(NUM_CELLS) if not (x_bits | o_bits) >> cell & 1]
+    mcts_rng.shuffle(cells)
+    for cell in cells:
+        if ai_turn:
+            o_bits |= 1 << cell
+            if WINNING[o_bits] if WINNING_TABLE else completes_line(o_bits, cell):
+                return WIN_VALUE
+        else:
+            x_bits |= 1 << cell
+            if WINNING[x_bits] if WINNING_TABLE else completes_line(x_bits, cell):
+                return LOSE_VALUE
+        ai_turn = not ai_turn
+    return DRAW_VALUE
+
+def _uct_child(pool: MCTSPool, node: int, ai_turn: bool) -> int:
+    """Hijo con mayor cota UCT para el jugador al turno en node"""
+    scale = MCTS_EXPLORATION * math.sqrt(math.log(pool.visits[node]))
+    best, best_score = -1, -math.inf
+    for child in pool.children[node]:
+        visits = pool.visits[child]
+        won = pool.wins[child] if ai_turn else pool.losses[child]
+        score = (won + 0.5 * pool.draws[child]) / visits + scale / math.sqrt(visits)
+        if score > best_score:
+            best, best_score = child, score
+    return best
+
+def mcts(x_bits: int, o_bits: int, iterations: int, budget_ms: float,
+         should_stop: Optional[Callable[[], bool]] = None) -> Tuple[int, int]:
+    """
+    MCTS con UCT desde una posición con la IA al turno, sobre mcts_pool
+    (la raíz es el nodo 0). Para tras iterations simulaciones, al agotar
+    budget_ms o si should_stop devuelve True.
+    Devuelve las simulaciones hechas y la profundidad máxima del árbol.
+    """
+    pool = mcts_pool
+    pool.clear()
+    if bits_winner(x_bits, o_bits) is not None or x_bits | o_bits == FULL_MASK:
+        return 0, 0
+    root = pool.add(-1, -1, x_bits, o_bits, None)
+    deadline = time.perf_counter() + budget_ms / 1000
+    max_depth = 0
+    
+    for iteration in range(iterations):
+        if iteration and not iteration & 255:
+            if time.perf_counter() > deadline or (should_stop is not None and should_stop()):
+                return iteration, max_depth
+        
+        # Selección: bajar por UCT mientras el nodo esté completamente expandido
+        node, ai_turn, depth = root, True, 0
+        while pool.result[node] is None and not pool.untried[node]:
+            node = _uct_child(pool, node, ai_turn)
+            ai_turn = not ai_turn
+            depth += 1
+        
+        # Expansión: una jugada nueva al azar
+        if pool.result[node] is None:
+            untried = pool.untried[node]
+            cells = [cell for cell in range(NUM_CELLS) if untried >> cell & 1]
+            cell = cells[mcts_rng.randrange(len(cells))]
+            pool.untried[node] = untried ^ 1 << cell
+            child_x, child_o = pool.x_bits[node], pool.o_bits[node]
+            if ai_turn:
+                child_o |= 1 << cell
+            else:
+                child_x |= 1 << cell
+            child = pool.add(node, cell, child_x, child_o, _move_result(child_x, child_o, cell, ai_turn))
+            pool.children[node].append(child)
+            node, ai_turn = child, not ai_turn
+            depth += 1
+        max_depth = max(max_depth, depth)
+        
+        # Simulación (los estados terminales ya conocen su resultado)
+        result = pool.result[node]
+        if result is None:
+            result = rollout(pool.x_bits[node], pool.o_bits[node], ai_turn)
+        
+        # Retropropagación hasta la raíz
+        while node >= 0:
+            pool.visits[node] += 1
+            if result == WIN_VALUE:
+                pool.wins[node] += 1
+            elif result == LOSE_VALUE:
+                pool.losses[node] += 1
+            else:
+                pool.draws[node] += 1
+            node = pool.parent[node]
+    
+    return iterations, max_depth
+
+# Búsqueda paralela de la raíz en varios procesos (modos minimax y alfabeta)
+parallel_workers = 0  # Procesos del grupo; 0 o 1 = búsqueda en serie
+_search_pool: Optional[ProcessPoolExecutor] = None
+_search_pool_key = None
+_worker_generation = None  # Generación de la tabla del proceso principal vista por este proceso
+
+def _init_search_worker(rows: int, cols: int, win_length: int):
+    """Prepara el motor en cada proceso del grupo de búsqueda"""
+    configure(rows, cols, win_length)
+
+def _search_root_child(x_bits: int, o_bits: int, last_bit: int, mode: str, alpha: float, generation: int):
+    """Tarea de un proceso: evalúa un hijo de la raíz (turno del humano) y
+    devuelve su valor, sus contadores y las entradas nuevas de su tabla"""
+    global search_mode, nodes_visited, pruned_branches, _worker_generation
+    if generation != _worker_generation:
+        state_cache.clear()  # La tabla del proceso principal se vació desde la última tarea
+        _worker_generation = generation
+    search_mode = mode
+    nodes_visited = pruned_branches = 0
+    hits, misses, known = state_cache.hits, state_cache.misses, len(state_cache)
+    if mode == "minimax":
+        value = minimax_bits(x_bits, o_bits, 1, False, last_bit)
+    else:
+        value = alphabeta_bits(x_bits, o_bits, 1, False, alpha, math.inf, last_bit)
+    new_entries = list(itertools.islice(state_cache.entries.items(), known, None))
+    return (value, nodes_visited, pruned_branches, state_cache.hits - hits,
+            state_cache.misses - misses, new_entries)
+
+def _get_search_pool() -> ProcessPoolExecutor:
+    """Grupo de procesos de búsqueda, creado al usarlo por primera vez"""
+    global _search_pool, _search_pool_key
+    key = (BOARD_ROWS, BOARD_COLS, WIN_LENGTH, parallel_workers)
+    if _search_pool is None or _search_pool_key != key:
+        shutdown_search_pool()
+        _search_pool = ProcessPoolExecutor(max_workers=parallel_workers, initializer=_init_search_worker,
+                                           initargs=key[:3])
+        _search_pool_key = key
+    return _search_pool
+
+def shutdown_search_pool():
+    """Cierra el grupo de procesos de búsqueda (si existe)"""
+    global _search_pool
+    if _search_pool is not None:
+        _search_pool.shutdown(wait=False)
+        _search_pool = None
+
+def parallel_root(x_bits: int, o_bits: int, cells: List[int],
+                  should_stop: Optional[Callable[[], bool]] = None, mode: Optional[str] = None):
+    """
+    Reparte los hijos de la raíz (la IA juega en cells) entre los procesos
+    del grupo y genera (casilla, valor, nodos) en el orden de cells.
+    Cada tarea nueva recibe como cota alfa el mejor valor ya conocido; como
+    los valores exactos son enteros, alfa = mejor - 0.5 solo descarta jugadas
+    estrictamente peores y el movimiento elegido coincide con el de la
+    búsqueda en serie. Las tablas de los procesos se fusionan con state_cache.
+    """
+    global nodes_visited, pruned_branches
+    if mode is None:
+        mode = search_mode
+    pool = _get_search_pool()
+    generation = state_cache.generation
+    best = -math.inf
+    futures = {}
+    results = {}
+    submitted = emitted = 0
+    try:
+        while emitted < len(cells):
+            # Mantener ocupados todos los procesos
+            while submitted < len(cells) and len(futures) < parallel_workers:
+                alpha = best - 0.5 if mode == "alfabeta" else -math.inf
+                bit = 1 << cells[submitted]
+                futures[pool.submit(_search_root_child, x_bits, o_bits | bit, bit,
+                                    mode, alpha, generation)] = cells[submitted]
+                submitted += 1
+            
+            done, _ = wait(futures, timeout=0.05, return_when=FIRST_COMPLETED)
+            if should_stop is not None and should_stop():
+                return
+            for future in done:
+                cell = futures.pop(future)
+                value, nodes, pruned, hits, misses, entries = future.result()
+                nodes_visited += nodes
+                pruned_branches += pruned
+                state_cache.hits += hits
+                state_cache.misses += misses
+                state_cache.merge(entries)
+                results[cell] = (value, nodes)
+                best = max(best, value)
+            
+            # Entregar los resultados en el orden de las casillas
+            while emitted < len(cells) and cells[emitted] in results:
+                value, nodes = results.pop(cells[emitted])
+                yield cells[emitted], value, nodes
+                emitted += 1
+    finally:
+        for future in futures:
+            future.cancel()
+
+def best_move(board_state=None, on_child: Optional[Callable[[TreeNode], None]] = None,
+              should_stop: Optional[Callable[[], bool]] = None, log_stats: bool = True) -> Tuple[int, int]:
+    """Encuentra el mejor movimiento para la IA usando Minimax y construye el árbol.
+    Busca sobre board_state (por defecto, el tablero global). Si se indica
+    on_child, se llama con cada hijo de la raíz ya evaluado; si should_stop
+    devuelve True, la búsqueda se abandona y el resultado no es fiable.
+    Con log_stats=False la búsqueda no se añade al registro de estadísticas."""
+    global tree_nodes, tree_edges, current_evaluation, nodes_visited, search_depth, tree_store
+    global pruned_branches, max_depth_reached, last_search_stats
+    
+    # Limpiar el árbol anterior (la tabla de transposición se conserva)
+    tree_nodes = []
+    tree_edges = []
+    tree_store = None
+    nodes_visited = 0
+    search_depth = 0
+    pruned_branches = 0
+    max_depth_reached = 0
+    start_time = time.perf_counter()
+    hits_before, misses_before = state_cache.hits, state_cache.misses
+    # La interfaz puede cambiar el modo o la captura mientras se busca: se
+    # leen una sola vez para que toda la búsqueda use los mismos
+    mode = search_mode
+    capture = capture_tree
+    
+    best_score = -math.inf
+    move = (-1, -1)
+    
+    # Nodo raíz (turno de la IA - Maximizador)
+    x_bits, o_bits = board_to_bits(board if board_state is None else board_state)
+    root_node = TreeNode((x_bits, o_bits), 0, 0, True)
+    
+    # Captura del árbol completo, además de la búsqueda normal (MCTS muestra
+    # sus propios recuentos de simulaciones)
+    if capture and NUM_CELLS <= MAX_CAPTURE_CELLS and mode != "mcts":
+        tree_store = TreeStore()
+        root_index = tree_store.add(-1, x_bits, o_bits, 0)
+    
+    # La búsqueda iterativa puntúa toda la raíz de una vez dentro del presupuesto
+    if mode == "iterativa":
+        root_scores, search_depth = iterative_deepening(x_bits, o_bits, time_budget_ms, should_stop)
+    
+    # MCTS también construye su árbol entero antes de publicar los hijos de la raíz
+    if mode == "mcts":
+        nodes_visited, search_depth = mcts(x_bits, o_bits, mcts_iterations, time_budget_ms, should_stop)
+        root_children = {mcts_pool.move[index]: index for index in mcts_pool.children[0]} if nodes_visited else {}
+    
+    # Con varios procesos, los hijos de la raíz se evalúan en paralelo
+    cells = bits_moves(x_bits, o_bits)
+    parallel = None
+    if parallel_workers > 1 and mode in ("minimax", "alfabeta") and len(cells) > 1:
+        parallel = parallel_root(x_bits, o_bits, cells, should_stop, mode)
+    
+    # Evaluar cada movimiento posible para la IA
+    stopped = False
+    for cell in cells:
+        if should_stop is not None and should_stop():
+            stopped = True
+            break
+        if parallel is not None:
+            result = next(parallel, None)
+            if result is None:  # Búsqueda cancelada
+                stopped = True
+                break
+        row, col = cell // BOARD_COLS, cell % BOARD_COLS
+        child = (x_bits, o_bits | 1 << cell)
+        
+        # Crear nodo para este movimiento
+        move_node = TreeNode(child, 0, 1, False, (row, col))
+        root_node.add_child(move_node)
+        
+        # Evaluar movimiento desde perspectiva del minimizador (Humano)
+        if mode == "iterativa":
+            score = root_scores[cell]
+        elif mode == "mcts":
+            # Valor medio de las simulaciones; W/L/D son sus resultados y su suma, las visitas
+            score = 0
+            index = root_children.get(cell)
+            if index is not None:
+                move_node.nodes = mcts_pool.visits[index]
+                move_node.set_counts(mcts_pool.wins[index], mcts_pool.losses[index], mcts_pool.draws[index])
+                score = (mcts_pool.wins[index] - mcts_pool.losses[index]) / mcts_pool.visits[index]
+        elif parallel is not None:
+            _, score, move_node.nodes = result
+        else:
+            nodes_before = nodes_visited
+            score = search_bits(*child, 1, False, 1 << cell, mode)
+            move_node.nodes = nodes_visited - nodes_before
+        if tree_store is not None:
+            index = capture_search(tree_store, *child, 1, False, root_index, cell)
+            move_node.set_counts(tree_store.wins[index], tree_store.losses[index], tree_store.draws[index])
+        
+        # Actualizar mejor movimiento
+        if score > best_score:
+            best_score = score
+            move = (row, col)
+        
+        # Actualizar valor del nodo
+        move_node.value = score
+        
+        # Mensaje de evaluación para visualización
+        current_evaluation = f"Evaluando ({row},{col}): {score}"
+        if on_child is not None:
+            callback_start = time.perf_counter()
+            on_child(move_node)
+            start_time += time.perf_counter() - callback_start  # El tiempo del llamador no cuenta
+    
+    if parallel is not None:
+        parallel.close()  # Cancela las tareas pendientes si se ha interrumpido
+    
+    # MCTS juega el hijo más visitado, más fiable que el de mejor media
+    if mode == "mcts" and root_node.children:
+        chosen = max(root_node.children, key=lambda node: node.nodes)
+        move, best_score = chosen.move, chosen.value
+    
+    # La raíz vale lo que su mejor hijo
+    if root_node.children:
+        root_node.value = best_score
+    
+    # Guardar la raíz en la tabla de transposición (solo valores exactos)
+    if move != (-1, -1) and mode not in ("iterativa", "mcts") and not stopped:
+        state_cache.store(x_bits, o_bits, True, best_score, move[0] * BOARD_COLS + move[1])
+    
+    # Los recuentos W/L/D ya se han acumulado al añadir cada hijo
+    if tree_store is not None:
+        tree_store.subtree_end[root_index] = len(tree_store)
+        tree_store.wins[root_index] = root_node.wins
+        tree_store.losses[root_index] = root_node.losses
+        tree_store.draws[root_index] = root_node.draws
+        if root_node.children:
+            tree_store.value[root_index] = max(tree_store.value[i] for i in tree_store.children(root_index))
+    
+    # Actualizar evaluación con interpretación
+    interpretation = ""
+    if mode == "mcts":
+        interpretation = f"estimación MCTS, {nodes_visited} simulaciones"
+    elif best_score == WIN_VALUE:
+        interpretation = "Victoria garantizada"
+    elif best_score == LOSE_VALUE:
+        interpretation = "Pérdida inevitable"
+    elif mode == "iterativa" and search_depth < len(root_node.children):
+        # La búsqueda no llegó al final de la partida: el valor es heurístico
+        interpretation = f"estimación a profundidad {search_depth}"
+    elif best_score == DRAW_VALUE:
+        interpretation = "Mejor resultado: empate"
+    
+    current_evaluation = (f"Mejor movimiento: {move} con valor {best_score:.3g} ({interpretation}), "
+                          f"{nodes_visited} nodos ({mode})")
+    
+    # Estadísticas de la jugada (y registro si la instrumentación está activa)
+    last_search_stats = {
+        "modo": mode,
+        "movimiento": list(move),
+        "valor": best_score,
+        "nodos": nodes_visited,
+        "aciertos_cache": state_cache.hits - hits_before,
+        "fallos_cache": state_cache.misses - misses_before,
+        "podas": pruned_branches,
+        "profundidad_max": search_depth if mode in ("iterativa", "mcts") else max_depth_reached,
+        "tiempo_ms": (time.perf_counter() - start_time) * 1000,
+        "cancelada": stopped,
+    }
+    if log_stats and instrumentation and stats_log_path is not None:
+        log_search_stats(stats_log_path, x_bits, o_bits)
+    return move
+
+def search_snapshot() -> Dict[str, object]:
+    """Resultado visible de la última búsqueda (árbol, contadores y
+    estadísticas), para conservarlo y restaurarlo más tarde"""
+    return {
+        "tree_nodes": tree_nodes,
+        "tree_edges": tree_edges,
+        "tree_store": tree_store,
+        "current_evaluation": current_evaluation,
+        "nodes_visited": nodes_visited,
+        "search_depth": search_depth,
+        "pruned_branches": pruned_branches,
+        "max_depth_reached": max_depth_reached,
+        "last_search_stats": last_search_stats,
+    }
+
+def restore_search(snapshot: Dict[str, object]):
+    """Vuelve a publicar una búsqueda guardada con search_snapshot"""
+    global tree_nodes, tree_edges, tree_store, current_evaluation, nodes_visited
+    global search_depth, pruned_branches, max_depth_reached, last_search_stats
+    tree_nodes = snapshot["tree_nodes"]
+    tree_edges = snapshot["tree_edges"]
+    tree_store = snapshot["tree_store"]
+    current_evaluation = snapshot["current_evaluation"]
+    nodes_visited = snapshot["nodes_visited"]
+    search_depth = snapshot["search_depth"]
+    pruned_branches = snapshot["pruned_branches"]
+    max_depth_reached = snapshot["max_depth_reached"]
+    last_search_stats = snapshot["last_search_stats"]
+
+def log_search_stats(path: str, x_bits: int, o_bits: int):
+    """Añade las estadísticas de la última jugada al registro JSON lines"""
+    record = dict(last_search_stats, tablero=[x_bits, o_bits],
+                  filas=BOARD_ROWS, columnas=BOARD_COLS, en_raya=WIN_LENGTH)
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+def reset_game():
+    """Reinicia el tablero y el árbol de búsqueda"""
+    global board, tree_nodes, tree_edges, tree_store, current_evaluation
+    board = [[None for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
+    tree_nodes = []
+    tree_edges = []
+    tree_store = None
+    current_evaluation = ""
+
+def check_game_over() -> bool:
+    """Comprueba si el juego ha terminado"""
+    winner = check_winner(board)
+    if winner or is_full(board):
+        return True
+    return False
+
+def analyze_tree():
+    """Analiza el árbol para actualizar estadísticas"""
+    if tree_nodes:
+        # Encontrar nodo raíz (profundidad 0)
+        for node in tree_nodes:
+            if node.depth == 0:
+                node.analyze_terminal_states()
+                break
+
+def available_search_modes() -> Tuple[str, ...]:
+    """Modos de búsqueda utilizables con el tablero actual"""
+    if is_standard_board():
+        return SEARCH_MODES
+    return tuple(mode for mode in SEARCH_MODES if mode != "tabla")
+
+def toggle_search_mode():
+    """Alterna entre los modos de búsqueda disponibles"""
+    global search_mode
+    modes = available_search_modes()
+    index = modes.index(search_mode) if search_mode in modes else -1
+    search_mode = modes[(index + 1) % len(modes)]
+
+def configure(rows: int = 3, cols: int = 3, win_length: int = 3):
+    """Cambia el tamaño del tablero y las fichas en línea necesarias para
+    ganar. Reinicia la partida y vacía la tabla de transposición."""
+    global BOARD_ROWS, BOARD_COLS, WIN_LENGTH, search_mode
+    if rows < 1 or cols < 1 or not 1 <= win_length <= max(rows, cols):
+        raise ValueError(f"tablero {rows}x{cols} con {win_length} en raya no válido")
+    BOARD_ROWS, BOARD_COLS, WIN_LENGTH = rows, cols, win_length
+    _build_tables()
+    state_cache.clear()
+    reset_game()
+    # En tableros grandes la búsqueda exhaustiva no termina en tiempo razonable
+    search_mode = "tabla" if is_standard_board() else "iterativa"
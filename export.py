@@ -0,0 +1,155 @@
+"""
+Exportación del árbol de búsqueda en flujo, sin construir tree_nodes.
+
+Las fuentes son generadores que producen un TreeRecord por nodo según se
+visita: search_records recorre el árbol Minimax completo desde una
+posición, tree_node_records un árbol de TreeNode ya construido (por
+ejemplo, el de la última jugada de la IA) y tree_store_records un árbol
+capturado en TreeStore. Los escritores vuelcan
+esos registros en JSON Lines o en DOT de Graphviz por bloques, así que la
+memoria no depende del tamaño del árbol:
+
+    python export.py --salida arbol.jsonl
+    python export.py --salida arbol.dot --filas 3 --columnas 3
+"""
+import sys
+import json
+import argparse
+from typing import Iterable, Iterator, NamedTuple, TextIO
+
+import engine
+
+FORMATS = ("jsonl", "dot")
+BLOCK_LINES = 4096  # Líneas acumuladas antes de cada escritura en el fichero
+
+class TreeRecord(NamedTuple):
+    id: int
+    parent: int   # -1 en la raíz
+    x_bits: int
+    o_bits: int
+    depth: int
+    move: int     # Casilla jugada para llegar (-1 en la raíz)
+    value: float
+    wins: int     # Finales con victoria de la IA en el subárbol
+    losses: int   # Finales con victoria del humano
+    draws: int
+
+def search_records(x_bits: int, o_bits: int) -> Iterator[TreeRecord]:
+    """
+    Recorre el árbol Minimax completo desde (x_bits, o_bits) con
+    engine.walk_tree, sin poda ni tabla de transposición, como la captura
+    del árbol. Los identificadores se asignan en preorden, pero cada nodo se
+    produce en postorden, cuando ya se conocen su valor y sus recuentos
+    W/L/D. La memoria es constante.
+    """
+    # Empieza el humano: mueve la IA si X tiene más fichas
+    is_maximizing = bin(x_bits).count("1") > bin(o_bits).count("1")
+    for fields in engine.walk_tree(x_bits, o_bits, is_maximizing):
+        yield TreeRecord._make(fields)
+
+def tree_node_records(root: "engine.TreeNode") -> Iterator[TreeRecord]:
+    """Recorre en preorden un árbol de TreeNode ya construido"""
+    next_id = 0
+    stack = [(root, -1)]
+    while stack:
+        node, parent = stack.pop()
+        node_id = next_id
+        next_id += 1
+        move = -1 if node.move is None else node.move[0] * engine.BOARD_COLS + node.move[1]
+        yield TreeRecord(node_id, parent, node.position[0], node.position[1], node.depth, move,
+                         node.value, node.wins, node.losses, node.draws)
+        stack.extend((child, node_id) for child in reversed(node.children))
+
+def tree_store_records(store: "engine.TreeStore") -> Iterator[TreeRecord]:
+    """Recorre un árbol capturado en TreeStore (sus nodos ya están en preorden)"""
+    for index in range(len(store)):
+        x_bits, o_bits = store.position(index)
+        yield TreeRecord(index, store.parent[index], x_bits, o_bits, store.depth[index],
+                         store.move[index], store.value[index], store.wins[index],
+                         store.losses[index], store.draws[index])
+
+def _move_cell(move: int):
+    """Casilla como [fila, columna] (None en la raíz)"""
+    return None if move < 0 else [move // engine.BOARD_COLS, move % engine.BOARD_COLS]
+
+def jsonl_lines(records: Iterable[TreeRecord]) -> Iterator[str]:
+    """Una línea JSON por nodo"""
+    for r in records:
+        yield json.dumps({
+            "id": r.id, "padre": r.parent, "tablero": [r.x_bits, r.o_bits],
+            "profundidad": r.depth, "movimiento": _move_cell(r.move), "valor": r.value,
+            "victorias": r.wins, "derrotas": r.losses, "empates": r.draws,
+        }, separators=(",", ":")) + "\n"
+
+def _board_label(x_bits: int, o_bits: int) -> str:
+    rows = []
+    for row in range(engine.BOARD_ROWS):
+        cells = []
+        for col in range(engine.BOARD_COLS):
+            bit = 1 << (row * engine.BOARD_COLS + col)
+            cells.append(engine.HUMAN if x_bits & bit else engine.AI if o_bits & bit else ".")
+        rows.append("".join(cells))
+    return "\\n".join(rows)
+
+def dot_lines(records: Iterable[TreeRecord]) -> Iterator[str]:
+    """Grafo DOT: cada nodo con su tablero, valor y W/L/D, y una arista desde
+    su padre (DOT admite aristas hacia nodos declarados más tarde)"""
+    yield "digraph arbol {\n"
+    yield '  node [shape=box, fontname="monospace"];\n'
+    for r in records:
+        yield (f'  n{r.id} [label="{_board_label(r.x_bits, r.o_bits)}\\n'
+               f'{r.value:.3g} W:{r.wins} L:{r.losses} D:{r.draws}"];\n')
+        if r.parent >= 0:
+            row, col = _move_cell(r.move)
+            yield f'  n{r.parent} -> n{r.id} [label="({row},{col})"];\n'
+    yield "}\n"
+
+def write_lines(lines: Iterable[str], f: TextIO) -> int:
+    """Escribe las líneas por bloques de BLOCK_LINES y devuelve cuántas eran"""
+    block = []
+    count = 0
+    for line in lines:
+        block.append(line)
+        if len(block) == BLOCK_LINES:
+            f.write("".join(block))
+            count += len(block)
+            block.clear()
+    f.write("".join(block))
+    return count + len(block)
+
+def export_tree(records: Iterable[TreeRecord], path: str, fmt: str = None) -> int:
+    """Vuelca los registros en path (formato por extensión si no se indica)
+    y devuelve el número de líneas escritas"""
+    if fmt is None:
+        fmt = "dot" if path.endswith((".dot", ".gv")) else "jsonl"
+    if fmt not in FORMATS:
+        raise ValueError(f"formato de exportación desconocido: {fmt}")
+    lines = dot_lines(records) if fmt == "dot" else jsonl_lines(records)
+    with open(path, "w") as f:
+        return write_lines(lines, f)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta el árbol Minimax completo de una posición")
+    parser.add_argument("--salida", required=True, help="fichero de salida (.jsonl o .dot)")
+    parser.add_argument("--formato", choices=FORMATS, default=None,
+                        help="formato de salida (por defecto, según la extensión)")
+    parser.add_argument("--tablero", type=int, nargs=2, default=(0, 0), metavar=("X", "O"),
+                        help="bitboards de X y O de la posición inicial (por defecto, vacía)")
+    parser.add_argument("--filas", type=int, default=3, help="filas del tablero")
+    parser.add_argument("--columnas", type=int, default=3, help="columnas del tablero")
+    parser.add_argument("--en-raya", type=int, default=3, help="fichas en línea para ganar")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        engine.configure(args.filas, args.columnas, args.en_raya)
+    except ValueError as e:
+        sys.exit(str(e))
+    x_bits, o_bits = args.tablero
+    lines = export_tree(search_records(x_bits, o_bits), args.salida, args.formato)
+    print(f"{lines} líneas escritas en {args.salida}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
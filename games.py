@@ -0,0 +1,250 @@
+"""
+Registro compacto de partidas del 3 en raya y reanálisis por lotes.
+
+Cada partida se guarda como su secuencia de casillas (0-8, empezando X),
+empaquetada en 9 nibbles: 4 bits por jugada, con 0xF en las jugadas que
+no llegaron a hacerse. Con un nibble de relleno, cada partida ocupa 5
+bytes de un registro binario al que solo se añaden partidas al final.
+En texto, una partida es su cadena de casillas, por ejemplo "40812".
+
+    python games.py partidas.bin                     # resumen y reanálisis
+    python games.py partidas.bin --generar 1000000   # añadir partidas al azar
+    python games.py partidas.bin --salida analisis.jsonl
+
+El reanálisis repite todas las partidas y puntúa cada posición con el
+motor, memorizando las posiciones (salvo simetría) y las partidas
+repetidas: el coste crece con las posiciones distintas, no con el total
+de jugadas.
+"""
+import os
+import sys
+import json
+import time
+import random
+import struct
+import argparse
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import engine
+
+LOG_MAGIC = b"TTTP"
+LOG_VERSION = 1
+LOG_HEADER = struct.Struct("<4sH")  # magia, versión
+MAX_MOVES = 9
+RECORD_SIZE = 5  # 9 nibbles de jugadas + 1 de relleno
+NO_MOVE = 0xF
+
+def pack_game(moves: List[int]) -> bytes:
+    """Empaqueta las casillas de una partida en un registro de 5 bytes"""
+    if len(moves) > MAX_MOVES or any(not 0 <= cell < MAX_MOVES for cell in moves):
+        raise ValueError(f"partida no válida: {moves}")
+    nibbles = list(moves) + [NO_MOVE] * (2 * RECORD_SIZE - len(moves))
+    return bytes(nibbles[i] << 4 | nibbles[i + 1] for i in range(0, 2 * RECORD_SIZE, 2))
+
+def unpack_game(record: bytes) -> List[int]:
+    """Casillas de una partida a partir de su registro. Lanza ValueError si
+    no es una partida posible: casillas fuera del tablero o repetidas, o
+    jugadas después de que alguien haya ganado."""
+    moves = []
+    x_bits = o_bits = 0
+    for byte in record:
+        for cell in (byte >> 4, byte & 0xF):
+            if cell == NO_MOVE:
+                return moves
+            if len(moves) == MAX_MOVES or cell >= MAX_MOVES:
+                raise ValueError(f"registro de partida no válido ({record.hex()}): casilla {cell}")
+            if (x_bits | o_bits) >> cell & 1:
+                raise ValueError(f"registro de partida no válido ({record.hex()}): casilla {cell} repetida")
+            if engine.bits_winner(x_bits, o_bits) is not None:
+                raise ValueError(f"registro de partida no válido ({record.hex()}): jugadas tras el final")
+            if len(moves) % 2 == 0:
+                x_bits |= 1 << cell
+            else:
+                o_bits |= 1 << cell
+            moves.append(cell)
+    return moves
+
+def moves_to_string(moves: List[int]) -> str:
+    return "".join(str(cell) for cell in moves)
+
+def string_to_moves(text: str) -> List[int]:
+    return [int(char) for char in text]
+
+def check_header(header: bytes):
+    """Lanza ValueError si header no es la cabecera de un registro de partidas"""
+    if len(header) < LOG_HEADER.size:
+        raise ValueError("registro de partidas truncado")
+    magic, version = LOG_HEADER.unpack_from(header)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError("el fichero no es un registro de partidas de esta versión")
+
+def append_games(path: str, games: Iterable[List[int]]) -> int:
+    """Añade partidas al final del registro (creándolo con su cabecera si
+    no existe) y devuelve cuántas se han escrito. Si el registro acaba en
+    un registro incompleto (escritura interrumpida), se recorta antes de
+    añadir, para que las partidas nuevas queden alineadas."""
+    payload = b"".join(pack_game(moves) for moves in games)
+    with open(path, "a+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            f.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION))
+        else:
+            f.seek(0)
+            check_header(f.read(LOG_HEADER.size))
+            torn = (size - LOG_HEADER.size) % RECORD_SIZE
+            if torn:
+                f.truncate(size - torn)
+        f.write(payload)
+    return len(payload) // RECORD_SIZE
+
+def append_game(path: str, moves: List[int]):
+    """Añade una partida terminada al registro"""
+    append_games(path, [moves])
+
+def read_records(path: str) -> Iterator[bytes]:
+    """Registros de 5 bytes del fichero, en orden. Un registro final
+    incompleto (escritura interrumpida) se ignora. Lanza ValueError si el
+    fichero no es un registro de partidas."""
+    with open(path, "rb") as f:
+        data = f.read()
+    check_header(data)
+    end = len(data) - (len(data) - LOG_HEADER.size) % RECORD_SIZE
+    for start in range(LOG_HEADER.size, end, RECORD_SIZE):
+        yield data[start:start + RECORD_SIZE]
+
+def random_game(rng: random.Random) -> List[int]:
+    """Partida con jugadas al azar hasta que alguien gana o se llena el tablero"""
+    cells = list(range(MAX_MOVES))
+    rng.shuffle(cells)
+    x_bits = o_bits = 0
+    for ply, cell in enumerate(cells):
+        if ply % 2 == 0:
+            x_bits |= 1 << cell
+        else:
+            o_bits |= 1 << cell
+        if engine.bits_winner(x_bits, o_bits) is not None:
+            return cells[:ply + 1]
+    return cells
+
+class Analyzer:
+    """Puntúa posiciones con el motor memorizando cada una: primero por sus
+    bitboards y, si no están, por su clave canónica (las 8 simetrías
+    comparten valor), de modo que el motor solo busca posiciones nuevas"""
+
+    def __init__(self):
+        self.values: Dict[int, float] = {}      # X | O << 9 -> valor
+        self.canonical: Dict[int, float] = {}  # Clave canónica -> valor
+        self.searches = 0
+
+    def value(self, x_bits: int, o_bits: int) -> float:
+        """Valor Minimax de la posición (empieza X, así que el turno se deduce)"""
+        packed = x_bits | o_bits << MAX_MOVES
+        value = self.values.get(packed)
+        if value is None:
+            key, _ = engine.canonical_key(x_bits, o_bits)
+            value = self.canonical.get(key)
+            if value is None:
+                winner = engine.bits_winner(x_bits, o_bits)
+                if winner is not None:
+                    value = engine.WIN_VALUE if winner == engine.AI else engine.LOSE_VALUE
+                elif x_bits | o_bits == engine.FULL_MASK:
+                    value = engine.DRAW_VALUE
+                else:
+                    is_maximizing = engine.POPCOUNT[x_bits] > engine.POPCOUNT[o_bits]
+                    value = engine.search_bits(x_bits, o_bits, 0, is_maximizing)
+                    self.searches += 1
+                self.canonical[key] = value
+            self.values[packed] = value
+        return value
+
+    def analyze_game(self, moves: List[int]) -> Dict[str, object]:
+        """Repite una partida y devuelve su resultado y sus errores: jugadas
+        que empeoran el valor de la posición para quien las hace"""
+        x_bits = o_bits = 0
+        value = self.value(x_bits, o_bits)
+        errors = []
+        for ply, cell in enumerate(moves):
+            if ply % 2 == 0:
+                x_bits |= 1 << cell
+            else:
+                o_bits |= 1 << cell
+            new_value = self.value(x_bits, o_bits)
+            if new_value != value:
+                errors.append({"jugada": ply, "jugador": engine.HUMAN if ply % 2 == 0 else engine.AI,
+                               "antes": value, "despues": new_value})
+            value = new_value
+        winner = engine.bits_winner(x_bits, o_bits)
+        if winner is not None:
+            result = "gana_x" if winner == engine.HUMAN else "gana_o"
+        else:
+            result = "empate" if x_bits | o_bits == engine.FULL_MASK else "sin_terminar"
+        return {"partida": moves_to_string(moves), "resultado": result, "errores": errors}
+
+def analyze_log(path: str, output: Optional[str] = None) -> Dict[str, object]:
+    """Reanaliza todas las partidas del registro. Las partidas idénticas se
+    analizan una sola vez; con output se escribe un análisis JSON Lines por
+    partida distinta (con cuántas veces aparece)."""
+    start = time.perf_counter()
+    counts = Counter(read_records(path))
+    analyzer = Analyzer()
+    results = Counter()
+    errors = Counter()
+    moves = 0
+    out = open(output, "w") if output else None
+    try:
+        for record, count in counts.items():
+            game = unpack_game(record)
+            analysis = analyzer.analyze_game(game)
+            moves += len(game) * count
+            results[analysis["resultado"]] += count
+            for error in analysis["errores"]:
+                errors[error["jugador"]] += count
+            if out is not None:
+                out.write(json.dumps(dict(analysis, veces=count)) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+    return {
+        "partidas": sum(counts.values()),
+        "partidas_distintas": len(counts),
+        "jugadas": moves,
+        "posiciones_distintas": len(analyzer.values),
+        "busquedas": analyzer.searches,
+        "resultados": dict(results),
+        "errores": {engine.HUMAN: errors[engine.HUMAN], engine.AI: errors[engine.AI]},
+        "tiempo_s": time.perf_counter() - start,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Registro compacto y reanálisis de partidas del 3 en raya")
+    parser.add_argument("registro", help="fichero binario de partidas")
+    parser.add_argument("--generar", type=int, default=0, metavar="N",
+                        help="añadir N partidas con jugadas al azar antes de analizar")
+    parser.add_argument("--semilla", type=int, default=0, help="semilla de las partidas generadas")
+    parser.add_argument("--modo", choices=engine.SEARCH_MODES[:3], default="tabla",
+                        help="búsqueda con la que se puntúan las posiciones")
+    parser.add_argument("--salida", help="fichero JSON Lines con el análisis de cada partida distinta")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    engine.search_mode = args.modo
+    if args.generar:
+        rng = random.Random(args.semilla)
+        try:
+            added = append_games(args.registro, (random_game(rng) for _ in range(args.generar)))
+        except ValueError as e:
+            sys.exit(str(e))
+        print(f"{added} partidas añadidas a {args.registro}")
+    if not os.path.exists(args.registro):
+        sys.exit(f"no existe el registro {args.registro}")
+    try:
+        summary = analyze_log(args.registro, args.salida)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
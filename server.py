@@ -0,0 +1,188 @@
+"""
+Servidor asyncio de partidas del 3 en raya: muchas partidas simultáneas,
+cada una con su propio estado, sobre un socket TCP o Unix local.
+
+    python server.py --puerto 8765
+    python server.py --socket /tmp/tres-en-raya.sock
+
+Protocolo de líneas de texto (una orden por línea, una respuesta por orden):
+
+    jugar <fila> <columna>   juega X (el humano) y responde la IA con O
+    reiniciar                empieza una partida nueva
+    estado                   describe la partida sin cambiarla
+    salir                    cierra la conexión
+
+Cada respuesta es "ok <tablero> <resultado> <jugada de la IA>", con el
+tablero fila a fila (X, O o . por casilla), el resultado "sigue",
+"gana_x", "gana_o" o "empate", y la jugada como "fila,columna" o "-"; o
+bien "error <motivo>". Todas las sesiones consultan la misma tabla
+resuelta del motor (mapeada en memoria y de solo lectura), así que cada
+jugada de la IA es una consulta O(1) y las sesiones no comparten estado
+mutable.
+"""
+import sys
+import asyncio
+import argparse
+from typing import Optional, Tuple
+
+import engine
+
+RESULTS = {engine.HUMAN: "gana_x", engine.AI: "gana_o"}
+
+class GameSession:
+    """Estado de una partida: lo único propio de cada conexión"""
+    __slots__ = ("x_bits", "o_bits")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.x_bits = 0
+        self.o_bits = 0
+
+    def result(self) -> str:
+        winner = engine.bits_winner(self.x_bits, self.o_bits)
+        if winner is not None:
+            return RESULTS[winner]
+        if self.x_bits | self.o_bits == engine.FULL_MASK:
+            return "empate"
+        return "sigue"
+
+    def play(self, row: int, col: int) -> Optional[int]:
+        """Juega el humano en (row, col) y, si la partida sigue, la IA.
+        Devuelve la casilla de la IA (None si no ha jugado). Lanza
+        ValueError si la jugada no es válida."""
+        if self.result() != "sigue":
+            raise ValueError("la partida ha terminado")
+        if not (0 <= row < engine.BOARD_ROWS and 0 <= col < engine.BOARD_COLS):
+            raise ValueError("casilla fuera del tablero")
+        cell = row * engine.BOARD_COLS + col
+        if (self.x_bits | self.o_bits) >> cell & 1:
+            raise ValueError("casilla ocupada")
+        self.x_bits |= 1 << cell
+        if self.result() != "sigue":
+            return None
+        reply = best_reply(self.x_bits, self.o_bits)
+        self.o_bits |= 1 << reply
+        return reply
+
+    def describe(self, reply: Optional[int] = None) -> str:
+        cells = []
+        for cell in range(engine.NUM_CELLS):
+            if self.x_bits >> cell & 1:
+                cells.append(engine.HUMAN)
+            elif self.o_bits >> cell & 1:
+                cells.append(engine.AI)
+            else:
+                cells.append(".")
+        move = "-" if reply is None else f"{reply // engine.BOARD_COLS},{reply % engine.BOARD_COLS}"
+        return f"ok {''.join(cells)} {self.result()} {move}"
+
+def best_reply(x_bits: int, o_bits: int) -> int:
+    """Jugada de la IA según la tabla resuelta compartida (la primera casilla
+    óptima, la misma que elige best_move en modo tabla)"""
+    _, optimal = engine.get_solved_table().lookup(x_bits, o_bits, True)
+    return (optimal & -optimal).bit_length() - 1
+
+def handle_command(session: GameSession, line: str) -> Tuple[str, bool]:
+    """Ejecuta una orden y devuelve la respuesta y si hay que cerrar"""
+    parts = line.split()
+    if not parts:
+        return "error orden vacía", False
+    command, args = parts[0].lower(), parts[1:]
+    if command == "jugar":
+        if len(args) != 2 or not all(arg.lstrip("-").isdigit() for arg in args):
+            return "error uso: jugar <fila> <columna>", False
+        try:
+            reply = session.play(int(args[0]), int(args[1]))
+        except ValueError as e:
+            return f"error {e}", False
+        return session.describe(reply), False
+    if command == "reiniciar":
+        session.reset()
+        return session.describe(), False
+    if command == "estado":
+        return session.describe(), False
+    if command == "salir":
+        return "ok adiós", True
+    return f"error orden desconocida: {command}", False
+
+MAX_LINE = 1024  # Bytes máximos de una orden sin fin de línea
+
+class GameProtocol(asyncio.Protocol):
+    """Una conexión con su propia GameSession. Cada orden completa se
+    responde dentro de la misma llamada a data_received, sin tareas ni
+    esperas intermedias del bucle de eventos."""
+
+    def __init__(self, server: "GameServer"):
+        self.server = server
+        self.session = GameSession()
+        self.transport = None
+        self.buffer = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.open_sessions += 1
+        self.server.total_sessions += 1
+
+    def connection_lost(self, exc):
+        self.server.open_sessions -= 1
+
+    def data_received(self, data: bytes):
+        *lines, self.buffer = (self.buffer + data).split(b"\n")
+        if len(self.buffer) > MAX_LINE:
+            self.transport.write(b"error orden demasiado larga\n")
+            self.transport.close()
+            return
+        responses = []
+        close = False
+        for line in lines:
+            response, close = handle_command(self.session, line.decode("utf-8", "replace"))
+            responses.append(response)
+            if close:
+                break
+        if responses:
+            self.transport.write("\n".join(responses).encode() + b"\n")
+        if close:
+            self.transport.close()
+
+class GameServer:
+    """Acepta conexiones y atiende cada una con su propio GameProtocol"""
+
+    def __init__(self):
+        self.open_sessions = 0  # Conexiones abiertas
+        self.total_sessions = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765,
+                    socket_path: Optional[str] = None) -> asyncio.AbstractServer:
+        """Abre el socket (Unix si se indica socket_path) y devuelve el servidor"""
+        engine.get_solved_table()  # Cargar la tabla antes de aceptar conexiones
+        loop = asyncio.get_running_loop()
+        if socket_path is not None:
+            return await loop.create_unix_server(lambda: GameProtocol(self), socket_path, backlog=4096)
+        return await loop.create_server(lambda: GameProtocol(self), host, port, backlog=4096)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de partidas simultáneas del 3 en raya")
+    parser.add_argument("--host", default="127.0.0.1", help="dirección TCP")
+    parser.add_argument("--puerto", type=int, default=8765, help="puerto TCP")
+    parser.add_argument("--socket", help="ruta de un socket Unix (en lugar de TCP)")
+    return parser.parse_args(argv)
+
+async def serve(args):
+    server = await GameServer().start(args.host, args.puerto, args.socket)
+    where = args.socket or f"{args.host}:{args.puerto}"
+    print(f"Sirviendo partidas en {where}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Torneo de autojuego sin interfaz: enfrenta políticas del motor en miles de
+partidas repartidas entre varios procesos y resume los resultados.
+
+    python tournament.py --partidas 2000 --procesos 4
+    python tournament.py --x aleatoria ruidosa --o ia --ruido 0.3
+
+Políticas disponibles:
+    ia         best_move del motor (solo para la IA, que juega con O)
+    optima     mejor jugada según la búsqueda exacta (al azar entre empates)
+    ruidosa    como optima, pero con probabilidad --ruido juega al azar
+    aleatoria  cualquier casilla libre
+
+El programa devuelve 1 si la política "ia" pierde alguna partida.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import engine
+
+POLICIES = ("ia", "optima", "ruidosa", "aleatoria")
+# Límites superiores (ms) de los cubos del histograma de latencia por jugada
+LATENCY_BUCKETS_MS = (0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000)
+CHUNK_SIZE = 50  # Partidas por tarea enviada a un proceso
+
+def init_worker(rows: int, cols: int, win_length: int, mode: Optional[str], budget_ms: int,
+                simulations: int):
+    """Configura el motor en cada proceso del torneo"""
+    engine.configure(rows, cols, win_length)
+    if mode is not None:
+        engine.search_mode = mode
+    engine.time_budget_ms = budget_ms
+    engine.mcts_iterations = simulations
+    engine.get_solved_table()
+
+def bucket_index(elapsed_ms: float) -> int:
+    for i, limit in enumerate(LATENCY_BUCKETS_MS):
+        if elapsed_ms <= limit:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+def optimal_moves(x_bits: int, o_bits: int, x_to_move: bool) -> List[int]:
+    """Casillas que consiguen el mejor valor exacto para el jugador al turno"""
+    scores = {}
+    for cell in engine.bits_moves(x_bits, o_bits):
+        if x_to_move:
+            scores[cell] = engine.search_bits(x_bits | 1 << cell, o_bits, 1, True, 1 << cell)
+        else:
+            scores[cell] = engine.search_bits(x_bits, o_bits | 1 << cell, 1, False, 1 << cell)
+    best = min(scores.values()) if x_to_move else max(scores.values())
+    return [cell for cell, score in scores.items() if score == best]
+
+def choose_move(policy: str, x_bits: int, o_bits: int, x_to_move: bool,
+                rng: random.Random, noise: float) -> int:
+    """Casilla elegida por una política"""
+    if policy == "aleatoria" or (policy == "ruidosa" and rng.random() < noise):
+        return rng.choice(engine.bits_moves(x_bits, o_bits))
+    if policy == "ia":
+        row, col = engine.best_move(engine.bits_to_board(x_bits, o_bits))
+        return row * engine.BOARD_COLS + col
+    return rng.choice(optimal_moves(x_bits, o_bits, x_to_move))
+
+def play_game(x_policy: str, o_policy: str, rng: random.Random, noise: float,
+              latencies: Dict[str, List[int]]) -> Tuple[Optional[str], List[int]]:
+    """Juega una partida (empieza X) y devuelve el ganador y las jugadas"""
+    x_bits = o_bits = 0
+    moves = []
+    x_to_move = True
+    while True:
+        winner = engine.bits_winner(x_bits, o_bits)
+        if winner is not None or x_bits | o_bits == engine.FULL_MASK:
+            return winner, moves
+        policy = x_policy if x_to_move else o_policy
+        start = time.perf_counter()
+        cell = choose_move(policy, x_bits, o_bits, x_to_move, rng, noise)
+        latencies[policy][bucket_index((time.perf_counter() - start) * 1000)] += 1
+        moves.append(cell)
+        if x_to_move:
+            x_bits |= 1 << cell
+        else:
+            o_bits |= 1 << cell
+        x_to_move = not x_to_move
+
+def play_games(x_policy: str, o_policy: str, count: int, seed: int, noise: float) -> Dict[str, object]:
+    """Tarea de un proceso: juega count partidas y devuelve sus totales"""
+    rng = random.Random(seed)
+    engine.mcts_rng.seed(seed)
+    latencies = {policy: [0] * (len(LATENCY_BUCKETS_MS) + 1) for policy in (x_policy, o_policy)}
+    outcomes = Counter()
+    losses = []
+    for _ in range(count):
+        winner, moves = play_game(x_policy, o_policy, rng, noise, latencies)
+        outcomes[{engine.HUMAN: "x", engine.AI: "o", None: "empate"}[winner]] += 1
+        if winner == engine.HUMAN and o_policy == "ia":
+            losses.append(moves)  # Partidas que la IA no debería haber perdido
+    return {"pairing": f"{x_policy}-{o_policy}", "outcomes": dict(outcomes),
+            "latencies": latencies, "ia_losses": losses}
+
+def merge(summary: Dict[str, object], result: Dict[str, object]):
+    """Acumula el resultado de una tarea en el resumen de su emparejamiento"""
+    entry = summary.setdefault(result["pairing"], {"outcomes": Counter(), "latencies": {}, "ia_losses": []})
+    entry["outcomes"].update(result["outcomes"])
+    for policy, counts in result["latencies"].items():
+        totals = entry["latencies"].setdefault(policy, [0] * len(counts))
+        for i, count in enumerate(counts):
+            totals[i] += count
+    entry["ia_losses"].extend(result["ia_losses"])
+
+def run_tournament(args) -> Dict[str, object]:
+    tasks = []
+    for x_policy in args.x:
+        for o_policy in args.o:
+            for first in range(0, args.partidas, CHUNK_SIZE):
+                count = min(CHUNK_SIZE, args.partidas - first)
+                tasks.append((x_policy, o_policy, count, args.semilla + len(tasks), args.ruido))
+
+    config = (args.filas, args.columnas, args.en_raya, args.modo, args.tiempo, args.simulaciones)
+    summary = {}
+    if args.procesos == 1:
+        init_worker(*config)
+        for task in tasks:
+            merge(summary, play_games(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=args.procesos, initializer=init_worker,
+                                 initargs=config) as pool:
+            futures = [pool.submit(play_games, *task) for task in tasks]
+            for future in as_completed(futures):
+                merge(summary, future.result())
+    return summary
+
+def print_summary(summary: Dict[str, object], elapsed: float):
+    labels = [f"<={limit:g}" for limit in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]:g}"]
+    total_games = 0
+    for pairing, entry in sorted(summary.items()):
+        outcomes = entry["outcomes"]
+        games = sum(outcomes.values())
+        total_games += games
+        print(f"{pairing}: {games} partidas | gana X {outcomes['x']} | gana O {outcomes['o']} "
+              f"| empates {outcomes['empate']}")
+        for policy, counts in entry["latencies"].items():
+            histogram = " ".join(f"{label}:{count}" for label, count in zip(labels, counts) if count)
+            print(f"    latencia {policy} (ms) {histogram}")
+    print(f"{total_games} partidas en {elapsed:.1f} s")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Torneo de autojuego del 3 en raya sin interfaz")
+    parser.add_argument("--x", nargs="+", choices=POLICIES[1:], default=["aleatoria", "ruidosa", "optima"],
+                        help="políticas del jugador X (empieza)")
+    parser.add_argument("--o", nargs="+", choices=POLICIES, default=["ia"],
+                        help="políticas del jugador O (la IA)")
+    parser.add_argument("--partidas", type=int, default=1000, help="partidas por emparejamiento")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--ruido", type=float, default=0.2,
+                        help="probabilidad de jugada al azar de la política ruidosa")
+    parser.add_argument("--semilla", type=int, default=0, help="semilla para reproducir el torneo")
+    parser.add_argument("--modo", choices=engine.SEARCH_MODES, default=None,
+                        help="modo de búsqueda del motor (por defecto, el del tablero)")
+    parser.add_argument("--filas", type=int, default=3, help="filas del tablero")
+    parser.add_argument("--columnas", type=int, default=3, help="columnas del tablero")
+    parser.add_argument("--en-raya", type=int, default=3, help="fichas en línea para ganar")
+    parser.add_argument("--tiempo", type=int, default=engine.time_budget_ms,
+                        help="milisegundos por jugada para las búsquedas iterativa y mcts")
+    parser.add_argument("--simulaciones", type=int, default=engine.mcts_iterations,
+                        help="simulaciones máximas por jugada de la búsqueda mcts")
+    parser.add_argument("--salida", help="fichero JSON donde guardar el resumen")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        engine.configure(args.filas, args.columnas, args.en_raya)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    start = time.perf_counter()
+    summary = run_tournament(args)
+    print_summary(summary, time.perf_counter() - start)
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump({"latency_buckets_ms": LATENCY_BUCKETS_MS, "pairings": summary}, f, indent=2)
+
+    losses = sum(len(entry["ia_losses"]) for entry in summary.values())
+    if losses:
+        print(f"La IA ha perdido {losses} partidas (ver ia_losses en la salida JSON)", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())